@@ -397,8 +397,7 @@ if __name__ == '__main__':
                         if re.match(r'cert-[A-Z][A-Z][A-Z][0-9][0-9].*',word):
                             VERIFY_EXPECTED.append(str(tok.linenr) + ':' + word)
 
-        for cfg in data.configurations:
-            cfg = data.Configuration(cfg)
+        for cfg in data.iterconfigurations():
             if (len(data.configurations) > 1) and (not args.quiet):
                 print('Checking %s, config %s...' % (dumpfile, cfg.name))
             exp05(cfg)
@@ -13,6 +13,19 @@ import json
 import os
 import sys
 
+try:
+    from sys import intern
+except ImportError:
+    # Python 2: intern() is a builtin that only accepts byte strings.
+    # ElementTree returns those for ASCII values, other values are kept.
+    import __builtin__
+
+    def intern(s):
+        try:
+            return __builtin__.intern(s)
+        except TypeError:
+            return s
+
 
 class Directive:
     """
@@ -26,7 +39,7 @@ class Directive:
     To iterate through all directives use such code:
     @code
     data = cppcheckdata.parsedump(...)
-    for cfg in data.configurations:
+    for cfg in data.iterconfigurations():
       for directive in cfg.directives:
         print(directive.str)
     @endcode
@@ -58,8 +71,11 @@ class ValueType:
     originalTypeName = None
 
     def __init__(self, element):
-        self.type = element.get('valueType-type')
-        self.sign = element.get('valueType-sign')
+        # Interned like Token.str, the addons compare these with literals
+        self.type = intern(element.get('valueType-type'))
+        sign = element.get('valueType-sign')
+        if sign:
+            self.sign = intern(sign)
         bits = element.get('valueType-bits')
         if bits:
             self.bits = int(bits)
@@ -137,7 +153,7 @@ class Token:
     To iterate through all tokens use such code:
     @code
     data = cppcheckdata.parsedump(...)
-    for cfg in data.configurations:
+    for cfg in data.iterconfigurations():
       code = ''
       for token in cfg.tokenlist:
         code = code + token.str + ' '
@@ -145,59 +161,39 @@ class Token:
     @endcode
     """
 
-    Id = None
-    str = None
-    next = None
-    previous = None
-    linkId = None
-    link = None
-    scopeId = None
-    scope = None
-    isName = False
-    isNumber = False
-    isInt = False
-    isFloat = False
-    isString = False
-    strlen = None
-    isChar = False
-    isOp = False
-    isArithmeticalOp = False
-    isAssignmentOp = False
-    isComparisonOp = False
-    isLogicalOp = False
-    isUnsigned = False
-    isSigned = False
-    isExpandedMacro = False
-    varId = None
-    variableId = None
-    variable = None
-    functionId = None
-    function = None
-    valuesId = None
-    values = None
-    valueType = None
-
-    typeScopeId = None
-    typeScope = None
-
-    astParentId = None
-    astParent = None
-    astOperand1Id = None
-    astOperand1 = None
-    astOperand2Id = None
-    astOperand2 = None
-
-    file = None
-    linenr = None
-    column = None
+    # Dump files contain very many tokens. Slots keep the instances small and
+    # make attribute access cheaper than a per-instance __dict__.
+    __slots__ = ('Id', 'str', 'next', 'previous', 'linkId', 'link', 'scopeId', 'scope',
+                 'isName', 'isNumber', 'isInt', 'isFloat', 'isString', 'strlen', 'isChar',
+                 'isOp', 'isArithmeticalOp', 'isAssignmentOp', 'isComparisonOp', 'isLogicalOp',
+                 'isUnsigned', 'isSigned', 'isExpandedMacro',
+                 'varId', 'variableId', 'variable', 'functionId', 'function',
+                 'valuesId', 'values', 'valueType', 'typeScopeId', 'typeScope',
+                 'astParentId', 'astParent', 'astOperand1Id', 'astOperand1', 'astOperand2Id', 'astOperand2',
+                 'file', 'linenr', 'column')
 
     def __init__(self, element):
         self.Id = element.get('id')
-        self.str = element.get('str')
+        # Interned so that comparisons with string literals are identity checks
+        self.str = intern(element.get('str'))
         self.next = None
         self.previous = None
         self.scopeId = element.get('scope')
         self.scope = None
+        self.isName = False
+        self.isNumber = False
+        self.isInt = False
+        self.isFloat = False
+        self.isString = False
+        self.strlen = None
+        self.isChar = False
+        self.isOp = False
+        self.isArithmeticalOp = False
+        self.isAssignmentOp = False
+        self.isComparisonOp = False
+        self.isLogicalOp = False
+        self.isUnsigned = False
+        self.isSigned = False
         type = element.get('type')
         if type == 'name':
             self.isName = True
@@ -226,10 +222,10 @@ class Token:
                 self.isComparisonOp = True
             elif element.get('isLogicalOp'):
                 self.isLogicalOp = True
-        if element.get('isExpandedMacro'):
-            self.isExpandedMacro = True
+        self.isExpandedMacro = bool(element.get('isExpandedMacro'))
         self.linkId = element.get('link')
         self.link = None
+        self.varId = None
         if element.get('varId'):
             self.varId = int(element.get('varId'))
         self.variableId = element.get('variable')
@@ -281,6 +277,33 @@ class Token:
         return None
 
 
+class ScanToken:
+    """
+    Lightweight token returned by scandump().
+
+    Only has the str, isName, isNumber, next, astOperand1, astOperand2,
+    file, linenr and column attributes of Token. These are much cheaper to
+    create than Token objects, which also parse the type, variable, function
+    and value information.
+    """
+
+    __slots__ = ('str', 'isName', 'isNumber', 'next', 'astOperand1', 'astOperand2',
+                 'file', 'linenr', 'column')
+
+    def __init__(self, element):
+        self.str = intern(element.get('str'))
+        type = element.get('type')
+        self.isName = (type == 'name')
+        self.isNumber = (type == 'number')
+        self.next = None
+        # Ids until they are resolved by scandump()
+        self.astOperand1 = element.get('astOperand1')
+        self.astOperand2 = element.get('astOperand2')
+        self.file = element.get('file')
+        self.linenr = int(element.get('linenr'))
+        self.column = int(element.get('column'))
+
+
 class Scope:
     """
     Scope. Information about global scope, function scopes, class scopes, inner scopes, etc.
@@ -321,7 +344,7 @@ class Scope:
         self.bodyEnd = None
         self.nestedInId = element.get('nestedIn')
         self.nestedIn = None
-        self.type = element.get('type')
+        self.type = intern(element.get('type'))
         self.isExecutable = (self.type in ('Function', 'If', 'Else', 'For', 'While', 'Do',
                                            'Switch', 'Try', 'Catch', 'Unconditional', 'Lambda'))
 
@@ -568,7 +591,7 @@ class Configuration:
     Attributes:
         name          Name of the configuration, "" for default
         directives    List of Directive items
-        tokenlist     List of Token items
+        tokenlist     List of Token items, see also tokensByStr()
         scopes        List of Scope items
         functions     List of Function items
         variables     List of Variable items
@@ -582,6 +605,7 @@ class Configuration:
     functions = []
     variables = []
     valueflow = []
+    _tokensByStr = None
 
     def __init__(self, confignode):
         self.name = confignode.get('cfg')
@@ -591,6 +615,7 @@ class Configuration:
         self.functions = []
         self.variables = []
         self.valueflow = []
+        self._tokensByStr = None
         arguments = []
 
         for element in confignode:
@@ -655,6 +680,18 @@ class Configuration:
         for variable in arguments:
             variable.setId(IdMap)
 
+    def tokensByStr(self, s):
+        """
+        Get the tokens with the given str, in tokenlist order.
+        The index is built on first use, so checks that only look at a
+        few kinds of tokens don't need to walk the whole tokenlist.
+        """
+        if self._tokensByStr is None:
+            self._tokensByStr = {}
+            for token in self.tokenlist:
+                self._tokensByStr.setdefault(token.str, []).append(token)
+        return self._tokensByStr.get(s, [])
+
 
 class Platform:
     """
@@ -709,22 +746,23 @@ class Standards:
 class CppcheckData:
     """
     Class that makes cppcheck dump data available
-    Contains a list of Configuration instances
+    Contains the dump nodes of the configurations, use iterconfigurations()
+    to get the Configuration instances
 
     Attributes:
-        configurations    List of Configurations
+        configurations    List of configuration dump nodes
 
     To iterate through all configurations use such code:
     @code
     data = cppcheckdata.parsedump(...)
-    for cfg in data.configurations:
+    for cfg in data.iterconfigurations():
         print('cfg: ' + cfg.name)
     @endcode
 
     To iterate through all tokens in each configuration use such code:
     @code
     data = cppcheckdata.parsedump(...)
-    for cfg in data.configurations:
+    for cfg in data.iterconfigurations():
         print('cfg: ' + cfg.name)
         code = ''
             for token in cfg.tokenlist:
@@ -735,7 +773,7 @@ class CppcheckData:
     To iterate through all scopes (functions, types, etc) use such code:
     @code
     data = cppcheckdata.parsedump(...)
-    for cfg in data.configurations:
+    for cfg in data.iterconfigurations():
         print('cfg: ' + cfg.name)
         for scope in cfg.scopes:
             print('    type:' + scope.type + ' name:' + scope.className)
@@ -748,7 +786,9 @@ class CppcheckData:
     suppressions = []
 
     def __init__(self, filename):
+        self.rawTokens = []
         self.configurations = []
+        self.suppressions = []
 
         data = ElementTree.parse(filename)
 
@@ -784,6 +824,14 @@ class CppcheckData:
     def Configuration(self,cfg):
         return Configuration(cfg)
 
+    def iterconfigurations(self):
+        """
+        Create and return iterator for the available configurations.
+        Each configuration is parsed when the iterator reaches it.
+        """
+        for cfgnode in self.configurations:
+            yield Configuration(cfgnode)
+
 
 # Get function arguments
 def getArgumentsRecursive(tok, arguments):
@@ -811,6 +859,100 @@ def parsedump(filename):
     return CppcheckData(filename)
 
 
+def scandump(filename):
+    """
+    scan the token lists of a cppcheck dump file one configuration at a time
+
+    The file is read incrementally and a tuple (configuration name, list of
+    ScanToken) is yielded as soon as a 'dump' node has been read. Only the
+    tokens are kept, all other nodes are cleared after use. Use parsedump()
+    if more than the tokens is needed.
+    """
+    depth = 0
+    name = None
+    tokens = []
+    tokenIds = {}
+    for event, node in ElementTree.iterparse(filename, events=('start', 'end')):
+        if event == 'start':
+            depth += 1
+            if depth == 2 and node.tag == 'dump':
+                name = node.get('cfg')
+            continue
+        depth -= 1
+        if depth > 3:
+            continue
+        if depth == 3 and node.tag == 'token':
+            # dumps/dump/tokenlist/token
+            token = ScanToken(node)
+            if tokens:
+                tokens[-1].next = token
+            tokens.append(token)
+            tokenIds[node.get('id')] = token
+        elif depth == 1 and node.tag == 'dump':
+            for token in tokens:
+                token.astOperand1 = tokenIds.get(token.astOperand1)
+                token.astOperand2 = tokenIds.get(token.astOperand2)
+            yield name, tokens
+            tokens = []
+            tokenIds = {}
+        node.clear()
+
+
+def getCacheKey(filename, *extra):
+    """
+    Get the key for caching results computed from a dump file.
+    The key is a hash of the file contents and the extra strings
+    (for instance the addon name and its options).
+    """
+    # Imported here because it is only needed when results are cached
+    import hashlib
+    h = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                break
+            h.update(chunk)
+    for s in extra:
+        h.update(s.encode('utf-8'))
+    return h.hexdigest()
+
+
+def loadCache(cachedir, key):
+    """
+    Load a result stored with storeCache().
+    Returns None if there is no usable cache entry.
+    """
+    try:
+        with open(os.path.join(cachedir, key + '.json'), 'rt') as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def storeCache(cachedir, key, result):
+    """
+    Store a JSON serializable result in the cache directory.
+    The entry is written to a temporary file first so that a concurrent
+    reader never sees a partial entry.
+    """
+    if not os.path.isdir(cachedir):
+        try:
+            os.makedirs(cachedir)
+        except OSError:
+            if not os.path.isdir(cachedir):
+                raise
+    filename = os.path.join(cachedir, key + '.json')
+    tmpname = '%s.%d.tmp' % (filename, os.getpid())
+    with open(tmpname, 'wt') as f:
+        json.dump(result, f)
+    try:
+        os.replace(tmpname, filename)
+    except AttributeError:
+        # Python 2
+        os.rename(tmpname, filename)
+
+
 def astIsFloat(token):
     """
     Check if type of ast node is float/double
@@ -883,6 +1025,40 @@ def simpleMatch(token, pattern):
     return True
 
 
+# Output of reportError() while a batch is active, see beginBatch()
+_batchOutput = None
+
+
+def beginBatch():
+    """
+    Buffer the output of reportError() until flushBatch() is called, so that
+    many findings are written with one write per stream instead of one each.
+    """
+    global _batchOutput
+    if _batchOutput is None:
+        _batchOutput = {}
+
+
+def flushBatch():
+    """
+    Write the output buffered since beginBatch() and stop buffering.
+    """
+    global _batchOutput
+    if _batchOutput is None:
+        return
+    output = _batchOutput
+    _batchOutput = None
+    for stream, texts in output.items():
+        stream.write(''.join(texts))
+
+
+def _writeReport(stream, text):
+    if _batchOutput is None:
+        stream.write(text)
+    else:
+        _batchOutput.setdefault(stream, []).append(text)
+
+
 def reportError(location, severity, message, addon, errorId, extra=''):
     if '--cli' in sys.argv:
         msg = { 'file': location.file,
@@ -893,9 +1069,9 @@ def reportError(location, severity, message, addon, errorId, extra=''):
                 'addon': addon,
                 'errorId': errorId,
                 'extra': extra}
-        sys.stdout.write(json.dumps(msg) + '\n')
+        _writeReport(sys.stdout, json.dumps(msg) + '\n')
     else:
         loc = '[%s:%i]' % (location.file, location.linenr)
         if len(extra) > 0:
             message += ' (' + extra + ')'
-        sys.stderr.write('%s (%s) %s [%s-%s]\n' % (loc, severity, message, addon, errorId))
+        _writeReport(sys.stderr, '%s (%s) %s [%s-%s]\n' % (loc, severity, message, addon, errorId))
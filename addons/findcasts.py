@@ -2,41 +2,167 @@
 #
 # Locate casts in the code
 #
+# Usage: findcasts.py [--cli] [--cache-dir=<dir>] [--jobs=<n>] <dumpfile>...
+#
+# With --cli each finding is written to stdout as one JSON object per line,
+# which is the format cppcheck reads from addons. Use it for other tools too.
+#
+# With --cache-dir the results for each dump file are stored in the given
+# directory and reused as long as the dump file is unchanged.
+#
+# With --jobs (or -j) greater than 1 the dump files are checked by that many
+# processes in parallel. By default they are checked one after another.
+#
 
 import cppcheckdata
-import sys
+import collections
+import functools
+import mmap
+import os
+import re
+from xml.sax.saxutils import unescape
 
-for arg in sys.argv[1:]:
-    if arg.startswith('-'):
-        continue
 
-    print('Checking ' + arg + '...')
-    data = cppcheckdata.parsedump(arg)
+# Location of a cast. Plain tuples are used so that results can be passed
+# between processes.
+Location = collections.namedtuple('Location', ['file', 'linenr', 'column'])
 
-    for cfg in data.configurations:
-        cfg = data.Configuration(cfg)
-        if len(data.configurations) > 1:
-            print('Checking ' + arg + ', config "' + cfg.name + '"...')
-        for token in cfg.tokenlist:
-            if token.str != '(' or not token.astOperand1 or token.astOperand2:
-                continue
+# A '(' token with astOperand1 but without astOperand2, as written in dump files.
+# Only such tokens can be casts, see getCasts(). The attributes are matched
+# with lookaheads so that their order in the element does not matter.
+CAST_CANDIDATE = re.compile(br'<token(?=[^>]* str="\(")(?=[^>]* astOperand1=")(?![^>]* astOperand2=)')
+CONFIGURATION_NAME = re.compile(br'<dump cfg="([^"]*)">')
+
+# Casts to these types are not reported.
+# void cast => often used to suppress compiler warnings
+IGNORED_CAST_TYPES = frozenset(['void'])
 
-            # Is it a lambda?
-            if token.astOperand1.str == '{':
-                continue
 
+def getCasts(tokenlist):
+    """
+    Return the tokens in tokenlist that are casts.
+    The whole token list is filtered in a single pass. The checks are
+    ordered so that most tokens are rejected before the AST is looked at.
+    """
+    return [token for token in tokenlist
+            if token.str == '('
             # we probably have a cast.. if there is something inside the parentheses
             # there is a cast. Otherwise this is a function call.
-            typetok = token.next
-            if not typetok.isName:
-                continue
-
+            and token.next.isName
+            and token.next.str not in IGNORED_CAST_TYPES
+            and token.astOperand1 is not None and token.astOperand2 is None
+            # Is it a lambda?
+            and token.astOperand1.str != '{'
             # cast number => skip output
-            if token.astOperand1.isNumber:
-                continue
+            and not token.astOperand1.isNumber]
+
+
+def prescanDumpFile(dumpfile):
+    """
+    Scan the text of a dump file without parsing the XML.
+    Returns the list of configuration names if the file can't contain any
+    cast, otherwise None.
+    """
+    with open(dumpfile, 'rb') as f:
+        try:
+            text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file, let the XML parser report the error
+            return None
+        try:
+            if CAST_CANDIDATE.search(text):
+                return None
+            return [unescape(name.decode('utf-8'), {'&quot;': '"'})
+                    for name in CONFIGURATION_NAME.findall(text)]
+        finally:
+            text.close()
+
+
+def checkDumpFile(dumpfile, cachedir=None):
+    """
+    Find the casts in all configurations of a dump file.
+    Returns a list of (configuration name, list of Location) tuples.
+    If cachedir is given, results are reused when the dump file is unchanged.
+    """
+    if cachedir:
+        # The sources are part of the key so that results are not reused
+        # after the addon or cppcheckdata changed
+        key = cppcheckdata.getCacheKey(dumpfile, 'findcasts',
+                                       cppcheckdata.getCacheKey(__file__),
+                                       cppcheckdata.getCacheKey(cppcheckdata.__file__))
+        cached = cppcheckdata.loadCache(cachedir, key)
+        if cached is not None:
+            return [(name, [Location(*location) for location in casts]) for name, casts in cached]
+
+    names = prescanDumpFile(dumpfile)
+    if names is not None:
+        result = [(name, []) for name in names]
+    else:
+        result = []
+        for name, tokens in cppcheckdata.scandump(dumpfile):
+            casts = [Location(token.file, token.linenr, token.column)
+                     for token in getCasts(tokens)]
+            result.append((name, casts))
+
+    if cachedir:
+        cppcheckdata.storeCache(cachedir, key, result)
+    return result
+
+
+def get_args():
+    parser = cppcheckdata.ArgumentParser()
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="Number of processes used to check the dump files in parallel")
+    parser.add_argument("--cache-dir", type=str, help="Directory where results are cached, they are reused as long as the dump file is unchanged")
+    return parser.parse_args()
+
+
+def main():
+    # Local bindings are cheaper to look up than module globals in the report loop
+    reportError = cppcheckdata.reportError
+
+    args = get_args()
+    dumpfiles = args.dumpfile
+    cachedir = None
+    if args.cache_dir:
+        cachedir = os.path.expanduser(args.cache_dir)
+    jobs = args.jobs
+    check = functools.partial(checkDumpFile, cachedir=cachedir)
+
+    # The dump files are independent so they can be checked in parallel.
+    # The results are reported here, in the order the files were given.
+    pool = None
+    if jobs > 1 and len(dumpfiles) > 1:
+        # Imported here because it is slow to import and only used with --jobs
+        import multiprocessing
+        pool = multiprocessing.Pool(jobs)
+        results = pool.imap(check, dumpfiles)
+    else:
+        results = map(check, dumpfiles)
+
+    # Headers and code shared by several configurations would otherwise
+    # report the same cast many times
+    reported = set()
+
+    try:
+        for dumpfile, configurations in zip(dumpfiles, results):
+            print('Checking ' + dumpfile + '...')
+            for name, casts in configurations:
+                if len(configurations) > 1:
+                    print('Checking ' + dumpfile + ', config "' + name + '"...')
+                cppcheckdata.beginBatch()
+                try:
+                    for location in casts:
+                        if location in reported:
+                            continue
+                        reported.add(location)
+                        reportError(location, 'information', 'found a cast', 'findcasts', 'cast')
+                finally:
+                    cppcheckdata.flushBatch()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
 
-            # void cast => often used to suppress compiler warnings
-            if typetok.str == 'void':
-                continue
 
-            cppcheckdata.reportError(token, 'information', 'found a cast', 'findcasts', 'cast')
+if __name__ == '__main__':
+    main()
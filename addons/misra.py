@@ -16,12 +16,13 @@
 from __future__ import print_function
 
 import cppcheckdata
+from cppcheckdata import intern
+import collections
 import itertools
 import sys
 import re
 import os
 import argparse
-import codecs
 import string
 
 try:
@@ -30,11 +31,6 @@ except ImportError:
     pass
 
 
-def grouped(iterable, n):
-    """s -> (s0,s1,s2,...sn-1), (sn,sn+1,sn+2,...s2n-1), (s2n,s2n+1,s2n+2,...s3n-1), ..."""
-    return zip(*[iter(iterable)]*n)
-
-
 typeBits = {
     'CHAR': None,
     'SHORT': None,
@@ -45,31 +41,36 @@ typeBits = {
 }
 
 
+# simpleMatch() patterns are constants, split each of them only once
+simpleMatchPatterns = {}
+
+
 def simpleMatch(token, pattern):
-    for p in pattern.split(' '):
+    parts = simpleMatchPatterns.get(pattern)
+    if parts is None:
+        parts = tuple(pattern.split(' '))
+        simpleMatchPatterns[pattern] = parts
+    return matchSequence(token, parts)
+
+
+def matchSequence(token, parts):
+    """
+    Like simpleMatch() but with the pattern already split into a tuple.
+    Used with module level patterns in checks that test every token.
+    """
+    for p in parts:
         if not token or token.str != p:
             return False
         token = token.next
     return True
 
 
-def rawlink(rawtoken):
-    if rawtoken.str == '}':
-        indent = 0
-        while rawtoken:
-            if rawtoken.str == '}':
-                indent = indent + 1
-            elif rawtoken.str == '{':
-                indent = indent - 1
-                if indent == 0:
-                    break
-            rawtoken = rawtoken.previous
-    else:
-        rawtoken = None
-    return rawtoken
+# Patterns for matchSequence()
+ARRAY_DESIGNATED_INITIALIZER = ('[', ']', '=', '{', '[')
+FALLTHROUGH_ATTRIBUTE = ('[', '[', 'fallthrough', ']', ']', ';')
 
 
-KEYWORDS = {
+KEYWORDS = frozenset({
     'auto',
     'break',
     'case',
@@ -102,12 +103,65 @@ KEYWORDS = {
     'void',
     'volatile',
     'while'
-}
+})
+
+# Integer types ordered by rank, bool is only an essential type
+INTEGER_TYPE_RANKS = {'char': 1, 'short': 2, 'int': 3, 'long': 4, 'long long': 5}
+ESSENTIAL_TYPE_RANKS = dict(INTEGER_TYPE_RANKS, bool=0)
+
+# Operators of composite expressions
+COMPOSITE_OPERATORS = frozenset(['+', '-', '*', '/', '%', '&', '|', '^', '>>', '<<', '?', ':', '~'])
+
+# Operators whose operands must have the same essential type category (rule 10.4)
+ARITHMETIC_OPERATORS = frozenset(['+', '-', '*', '/', '%', '&', '|', '^', '+=', '-=', ':'])
+
+# Standard library names that some rules forbid
+VARIADIC_ARGUMENT_NAMES = frozenset(['va_list', 'va_arg', 'va_start', 'va_end', 'va_copy'])
+DYNAMIC_MEMORY_FUNCTIONS = frozenset(['malloc', 'calloc', 'realloc', 'free'])
+STRING_CONVERSION_FUNCTIONS = frozenset(['atof', 'atoi', 'atol', 'atoll'])
+ENVIRONMENT_FUNCTIONS = frozenset(['abort', 'exit', 'getenv', 'system'])
+FLOATING_POINT_EXCEPTION_FUNCTIONS = frozenset([
+    'feclearexcept',
+    'fegetexceptflag',
+    'feraiseexcept',
+    'fesetexceptflag',
+    'fetestexcept'])
+
+# Preprocessor directives allowed by rule 20.13
+PREPROCESSOR_DIRECTIVES = frozenset(['define', 'elif', 'else', 'endif', 'error', 'if', 'ifdef', 'ifndef',
+                                     'include', 'pragma', 'undef', 'warning'])
+
+# Directives that open a conditional block (rule 20.14)
+IF_DIRECTIVES = frozenset(['#if', '#ifdef', '#ifndef'])
+
+# Characters that make an identifier starting with '_' reserved (rule 21.1)
+RESERVED_IDENTIFIER_SECOND_CHARS = frozenset(string.ascii_uppercase + '_')
+
+
+# Essential types are computed recursively and the same AST nodes are
+# visited by several rules, so the results are cached per token.
+# parseDump() clears the caches for each configuration.
+essentialTypeCache = {}
+essentialTypeCategoryCache = {}
+NOT_CACHED = object()
+
+
+def clearEssentialTypeCaches():
+    essentialTypeCache.clear()
+    essentialTypeCategoryCache.clear()
 
 
 def getEssentialTypeCategory(expr):
     if not expr:
         return None
+    ret = essentialTypeCategoryCache.get(expr, NOT_CACHED)
+    if ret is NOT_CACHED:
+        ret = computeEssentialTypeCategory(expr)
+        essentialTypeCategoryCache[expr] = ret
+    return ret
+
+
+def computeEssentialTypeCategory(expr):
     if expr.str == ',':
         return getEssentialTypeCategory(expr.astOperand2)
     if expr.str in ('<', '<=', '==', '!=', '>=', '>', '&&', '||', '!'):
@@ -159,6 +213,14 @@ def getEssentialCategorylist(operand1, operand2):
 def getEssentialType(expr):
     if not expr:
         return None
+    ret = essentialTypeCache.get(expr, NOT_CACHED)
+    if ret is NOT_CACHED:
+        ret = computeEssentialType(expr)
+        essentialTypeCache[expr] = ret
+    return ret
+
+
+def computeEssentialType(expr):
     if expr.variable:
         typeToken = expr.variable.typeStartToken
         while typeToken and typeToken.isName:
@@ -175,15 +237,13 @@ def getEssentialType(expr):
         e2 = getEssentialType(expr.astOperand2)
         if not e1 or not e2:
             return None
-        types = ['bool', 'char', 'short', 'int', 'long', 'long long']
-        try:
-            i1 = types.index(e1)
-            i2 = types.index(e2)
-            if i2 >= i1:
-                return types[i2]
-            return types[i1]
-        except ValueError:
+        i1 = ESSENTIAL_TYPE_RANKS.get(e1)
+        i2 = ESSENTIAL_TYPE_RANKS.get(e2)
+        if i1 is None or i2 is None:
             return None
+        if i2 >= i1:
+            return e2
+        return e1
     elif expr.str == "~":
         e1 = getEssentialType(expr.astOperand1)
         return e1
@@ -211,7 +271,7 @@ def bitsOfEssentialType(expr):
 def isCast(expr):
     if not expr or expr.str != '(' or not expr.astOperand1 or expr.astOperand2:
         return False
-    if simpleMatch(expr, '( )'):
+    if expr.next and expr.next.str == ')':
         return False
     return True
 
@@ -233,12 +293,22 @@ def hasExternalLinkage(var):
 
 
 def countSideEffects(expr):
-    if not expr or expr.str in (',', ';'):
+    if not expr:
         return 0
     ret = 0
-    if expr.str in ('++', '--', '='):
-        ret = 1
-    return ret + countSideEffects(expr.astOperand1) + countSideEffects(expr.astOperand2)
+    stack = [expr]
+    while stack:
+        expr = stack.pop()
+        if expr.str in (',', ';'):
+            continue
+        if expr.str in ('++', '--', '='):
+            ret += 1
+        # Only push real operands, most AST nodes are leaves
+        if expr.astOperand1:
+            stack.append(expr.astOperand1)
+        if expr.astOperand2:
+            stack.append(expr.astOperand2)
+    return ret
 
 
 def getForLoopExpressions(forToken):
@@ -257,23 +327,28 @@ def getForLoopExpressions(forToken):
 
 
 def findCounterTokens(cond):
-    if not cond:
-        return []
-    if cond.str in ['&&', '||']:
-        c = findCounterTokens(cond.astOperand1)
-        c.extend(findCounterTokens(cond.astOperand2))
-        return c
     ret = []
-    if ((cond.isArithmeticalOp and cond.astOperand1 and cond.astOperand2) or
-            (cond.isComparisonOp and cond.astOperand1 and cond.astOperand2)):
-        if cond.astOperand1.isName:
-            ret.append(cond.astOperand1)
-        if cond.astOperand2.isName:
-            ret.append(cond.astOperand2)
-        if cond.astOperand1.isOp:
-            ret.extend(findCounterTokens(cond.astOperand1))
-        if cond.astOperand2.isOp:
-            ret.extend(findCounterTokens(cond.astOperand2))
+    # Operands are pushed in reverse so that the counters are returned in
+    # the order of the expression
+    stack = [cond]
+    while stack:
+        cond = stack.pop()
+        if not cond:
+            continue
+        if cond.str in ['&&', '||']:
+            stack.append(cond.astOperand2)
+            stack.append(cond.astOperand1)
+            continue
+        if ((cond.isArithmeticalOp and cond.astOperand1 and cond.astOperand2) or
+                (cond.isComparisonOp and cond.astOperand1 and cond.astOperand2)):
+            if cond.astOperand1.isName:
+                ret.append(cond.astOperand1)
+            if cond.astOperand2.isName:
+                ret.append(cond.astOperand2)
+            if cond.astOperand2.isOp:
+                stack.append(cond.astOperand2)
+            if cond.astOperand1.isOp:
+                stack.append(cond.astOperand1)
     return ret
 
 
@@ -282,7 +357,10 @@ def isFloatCounterInWhileLoop(whileToken):
         return False
     lpar = whileToken.next
     rpar = lpar.link
-    counterTokens = findCounterTokens(lpar.astOperand2)
+    floatCounters = [counterToken for counterToken in findCounterTokens(lpar.astOperand2)
+                     if counterToken.valueType and counterToken.valueType.isFloat()]
+    if not floatCounters:
+        return False
     whileBodyStart = None
     if simpleMatch(rpar, ') {'):
         whileBodyStart = rpar.next
@@ -293,9 +371,7 @@ def isFloatCounterInWhileLoop(whileToken):
     token = whileBodyStart
     while token != whileBodyStart.link:
         token = token.next
-        for counterToken in counterTokens:
-            if not counterToken.valueType or not counterToken.valueType.isFloat():
-                continue
+        for counterToken in floatCounters:
             if token.isAssignmentOp and token.astOperand1.str == counterToken.str:
                 return True
             if token.str == counterToken.str and token.astParent and token.astParent.str in ('++', '--'):
@@ -304,22 +380,28 @@ def isFloatCounterInWhileLoop(whileToken):
 
 
 def hasSideEffectsRecursive(expr):
-    if not expr:
-        return False
-    if expr.str == '=' and expr.astOperand1 and expr.astOperand1.str == '[':
-        prev = expr.astOperand1.previous
-        if prev and (prev.str == '{' or prev.str == '{'):
-            return hasSideEffectsRecursive(expr.astOperand2)
-    if expr.str == '=' and expr.astOperand1 and expr.astOperand1.str == '.':
-        e = expr.astOperand1
-        while e and e.str == '.' and e.astOperand2:
-            e = e.astOperand1
-        if e and e.str == '.':
-            return False
-    if expr.str in ('++', '--', '='):
-        return True
-    # Todo: Check function calls
-    return hasSideEffectsRecursive(expr.astOperand1) or hasSideEffectsRecursive(expr.astOperand2)
+    stack = [expr]
+    while stack:
+        expr = stack.pop()
+        if not expr:
+            continue
+        if expr.str == '=' and expr.astOperand1 and expr.astOperand1.str == '[':
+            prev = expr.astOperand1.previous
+            if prev and (prev.str == '{' or prev.str == '{'):
+                stack.append(expr.astOperand2)
+                continue
+        if expr.str == '=' and expr.astOperand1 and expr.astOperand1.str == '.':
+            e = expr.astOperand1
+            while e and e.str == '.' and e.astOperand2:
+                e = e.astOperand1
+            if e and e.str == '.':
+                continue
+        if expr.str in ('++', '--', '='):
+            return True
+        # Todo: Check function calls
+        stack.append(expr.astOperand2)
+        stack.append(expr.astOperand1)
+    return False
 
 
 def isBoolExpression(expr):
@@ -331,16 +413,19 @@ def isBoolExpression(expr):
 
 
 def isConstantExpression(expr):
-    if expr.isNumber:
-        return True
-    if expr.isName:
-        return False
-    if simpleMatch(expr.previous, 'sizeof ('):
-        return True
-    if expr.astOperand1 and not isConstantExpression(expr.astOperand1):
-        return False
-    if expr.astOperand2 and not isConstantExpression(expr.astOperand2):
-        return False
+    stack = [expr]
+    while stack:
+        expr = stack.pop()
+        if expr.isNumber:
+            continue
+        if expr.isName:
+            return False
+        if simpleMatch(expr.previous, 'sizeof ('):
+            continue
+        if expr.astOperand2:
+            stack.append(expr.astOperand2)
+        if expr.astOperand1:
+            stack.append(expr.astOperand1)
     return True
 
 
@@ -355,72 +440,80 @@ def isUnsignedInt(expr):
     return False
 
 
+# Precedence of the binary operators, assignments are handled by getPrecedence()
+PRECEDENCE = {
+    '*': 12, '/': 12, '%': 12,
+    '+': 11, '-': 11,
+    '<<': 10, '>>': 10,
+    '<': 9, '>': 9, '<=': 9, '>=': 9,
+    '==': 8, '!=': 8,
+    '&': 7,
+    '^': 6,
+    '|': 5,
+    '&&': 4,
+    '||': 3,
+    '?': 2, ':': 2,
+    ',': 0
+}
+
+
 def getPrecedence(expr):
     if not expr:
         return 16
     if not expr.astOperand1 or not expr.astOperand2:
         return 16
-    if expr.str in ('*', '/', '%'):
-        return 12
-    if expr.str in ('+', '-'):
-        return 11
-    if expr.str in ('<<', '>>'):
-        return 10
-    if expr.str in ('<', '>', '<=', '>='):
-        return 9
-    if expr.str in ('==', '!='):
-        return 8
-    if expr.str == '&':
-        return 7
-    if expr.str == '^':
-        return 6
-    if expr.str == '|':
-        return 5
-    if expr.str == '&&':
-        return 4
-    if expr.str == '||':
-        return 3
-    if expr.str in ('?', ':'):
-        return 2
+    precedence = PRECEDENCE.get(expr.str)
+    if precedence is not None:
+        return precedence
     if expr.isAssignmentOp:
         return 1
-    if expr.str == ',':
-        return 0
     return -1
 
 
-def findRawLink(token):
-    tok1 = None
-    tok2 = None
-    forward = False
-
-    if token.str in '{([':
-        tok1 = token.str
-        tok2 = '})]'['{(['.find(token.str)]
-        forward = True
-    elif token.str in '})]':
-        tok1 = token.str
-        tok2 = '{(['['})]'.find(token.str)]
-        forward = False
-    else:
-        return None
+# Raw tokens that start with one of these are comments
+COMMENT_PREFIXES = ('//', '/*')
 
-    # try to find link
-    indent = 0
-    while token:
-        if token.str == tok1:
-            indent = indent + 1
-        elif token.str == tok2:
-            if indent <= 1:
-                return token
-            indent = indent - 1
-        if forward is True:
-            token = token.next
-        else:
-            token = token.previous
 
-    # raw link not found
-    return None
+def splitRawTokens(rawTokens):
+    """
+    Returns (comments, literals): the comment tokens and the string and
+    character literal tokens in a raw token list. The rule 3.x and 4.x
+    checks only look at these, so they don't have to walk all raw tokens.
+    """
+    comments = []
+    literals = []
+    appendComment = comments.append
+    appendLiteral = literals.append
+    for token in rawTokens:
+        first = token.str[0]
+        if first == '/':
+            if token.str.startswith(COMMENT_PREFIXES):
+                appendComment(token)
+        elif first == '"' or first == '\'':
+            appendLiteral(token)
+    return comments, literals
+
+
+def linkRawTokens(rawTokens):
+    """
+    Pair the brackets in a raw token list in a single pass.
+    Returns a dict that maps each '{', '(' and '[' to the matching closing
+    bracket and each closing bracket to the matching opening bracket.
+    Unbalanced brackets are not in the dict.
+    """
+    links = {}
+    openBrackets = {'{': [], '(': [], '[': []}
+    closeBrackets = {'}': '{', ')': '(', ']': '['}
+    for token in rawTokens:
+        if token.str in openBrackets:
+            openBrackets[token.str].append(token)
+        elif token.str in closeBrackets:
+            stack = openBrackets[closeBrackets[token.str]]
+            if stack:
+                start = stack.pop()
+                links[start] = token
+                links[token] = start
+    return links
 
 
 def numberOfParentheses(tok1, tok2):
@@ -431,44 +524,112 @@ def numberOfParentheses(tok1, tok2):
     return tok1 == tok2
 
 
-def findGotoLabel(gotoToken):
-    label = gotoToken.next.str
-    tok = gotoToken.next.next
-    while tok:
+def findGotoLabels(tokenlist):
+    """
+    Find the label of each goto in a single pass over the token list.
+    Returns a dict that maps each goto token to the first matching label
+    after it in the same function. Gotos without such a label are not in
+    the dict.
+    """
+    gotoLabels = {}
+    # label name => gotos before the current token that still look for it
+    pending = {}
+    for tok in tokenlist:
         if tok.str == '}' and tok.scope.type == 'Function':
-            break
-        if tok.str == label and tok.next.str == ':':
-            return tok
-        tok = tok.next
-    return None
+            pending.clear()
+        elif tok.str in pending and tok.next and tok.next.str == ':':
+            for gotoToken in pending.pop(tok.str):
+                gotoLabels[gotoToken] = tok
+        elif tok.str == 'goto' and tok.next and tok.next.isName:
+            pending.setdefault(tok.next.str, []).append(tok)
+    return gotoLabels
 
 
-def findInclude(directives, header):
-    for directive in directives:
-        if directive.str == '#include ' + header:
-            return directive
-    return None
+def findCallCycles(function_calls):
+    """
+    Find the strongly connected components of a call graph, with an
+    iterative version of Tarjan's algorithm.
+    function_calls maps each function to the functions it calls. Returns a
+    dict that maps each function to the index of its component. A call
+    is recursive if the caller and the callee are in the same component.
+    """
+    components = {}
+    index = {}
+    lowlink = {}
+    stack = []
+    onStack = set()
+    for root in function_calls:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        onStack.add(root)
+        # (function, iterator over its callees) for the current call path
+        path = [(root, iter(function_calls[root]))]
+        while path:
+            func, callees = path[-1]
+            for callee in callees:
+                if callee not in index:
+                    index[callee] = lowlink[callee] = len(index)
+                    stack.append(callee)
+                    onStack.add(callee)
+                    path.append((callee, iter(function_calls.get(callee, ()))))
+                    break
+                if callee in onStack:
+                    lowlink[func] = min(lowlink[func], index[callee])
+            else:
+                path.pop()
+                if path:
+                    caller = path[-1][0]
+                    lowlink[caller] = min(lowlink[caller], lowlink[func])
+                if lowlink[func] == index[func]:
+                    component = len(components)
+                    while True:
+                        member = stack.pop()
+                        onStack.discard(member)
+                        components[member] = component
+                        if member is func:
+                            break
+    return components
+
+
+# (directives, {header: first #include directive}) for the last directive
+# list that findInclude() searched
+includeIndex = (None, {})
 
 
-# Get function arguments
-def getArgumentsRecursive(tok, arguments):
-    if tok is None:
-        return
-    if tok.str == ',':
-        getArgumentsRecursive(tok.astOperand1, arguments)
-        getArgumentsRecursive(tok.astOperand2, arguments)
-    else:
-        arguments.append(tok)
+def findInclude(directives, header):
+    global includeIndex
+    if includeIndex[0] is not directives:
+        index = {}
+        for directive in directives:
+            if directive.str.startswith('#include '):
+                index.setdefault(directive.str[len('#include '):], directive)
+        includeIndex = (directives, index)
+    return includeIndex[1].get(header)
 
 
+# Get function arguments
 def getArguments(ftok):
     arguments = []
-    getArgumentsRecursive(ftok.astOperand2, arguments)
+    stack = [ftok.astOperand2]
+    while stack:
+        tok = stack.pop()
+        if tok is None:
+            continue
+        if tok.str == ',':
+            stack.append(tok.astOperand2)
+            stack.append(tok.astOperand1)
+        else:
+            arguments.append(tok)
     return arguments
 
 
-def isalnum(c):
-    return c in string.digits or c in string.ascii_letters
+IDENTIFIER_CHARS = frozenset(string.digits + string.ascii_letters + '_')
+HEX_DIGITS = frozenset(string.hexdigits)
+OCT_DIGITS = frozenset(string.octdigits)
+SIMPLE_ESCAPE_CHARS = frozenset(("'", '"', '?', '\\', 'a', 'b', 'f', 'n', 'r', 't', 'v'))
+NUMERIC_ESCAPE_CHARS = frozenset('x' + string.octdigits)
 
 
 def isHexEscapeSequence(symbols):
@@ -481,7 +642,7 @@ def isHexEscapeSequence(symbols):
     Reference: n1570 6.4.4.4"""
     if len(symbols) < 3 or symbols[:2] != '\\x':
         return False
-    return all([s in string.hexdigits for s in symbols[2:]])
+    return HEX_DIGITS.issuperset(symbols[2:])
 
 
 def isOctalEscapeSequence(symbols):
@@ -495,7 +656,7 @@ def isOctalEscapeSequence(symbols):
     Reference: n1570 6.4.4.4"""
     if len(symbols) not in range(2, 5) or symbols[0] != '\\':
         return False
-    return all([s in string.octdigits for s in symbols[1:]])
+    return OCT_DIGITS.issuperset(symbols[1:])
 
 
 def isSimpleEscapeSequence(symbols):
@@ -503,16 +664,16 @@ def isSimpleEscapeSequence(symbols):
     Reference: n1570 6.4.4.4"""
     if len(symbols) != 2 or symbols[0] != '\\':
         return False
-    return symbols[1] in ("'", '"', '?', '\\', 'a', 'b', 'f', 'n', 'r', 't', 'v')
+    return symbols[1] in SIMPLE_ESCAPE_CHARS
 
 
 def hasNumericEscapeSequence(symbols):
     """Check that given string contains octal or hexadecimal escape sequences."""
-    if '\\' not in symbols:
-        return False
-    for c, cn in grouped(symbols, 2):
-        if c == '\\' and cn in ('x' + string.octdigits):
+    pos = symbols.find('\\')
+    while pos != -1 and pos + 1 < len(symbols):
+        if symbols[pos + 1] in NUMERIC_ESCAPE_CHARS:
             return True
+        pos = symbols.find('\\', pos + 2)
     return False
 
 
@@ -533,12 +694,35 @@ def isNoReturnScope(tok):
     return False
 
 
+# Regular expressions used by the checks, compiled once
+DEFINE_NAME = re.compile(r'#define ([a-zA-Z0-9_]+)')
+# Name and, for function-like macros, the parameter list
+DEFINE_NAME_PARAMS = re.compile(r'#define ([a-zA-Z0-9_]+)(?:[(]([a-zA-Z0-9_, ]+)[)])?')
+DEFINE_FUNCTION_MACRO = re.compile(r'#define [A-Za-z0-9_]+\(([A-Za-z0-9_,]+)\)[ ]+(.*)')
+DEFINE_LOWERCASE_NAME = re.compile(r'#define ([a-z][a-z0-9_]+)')
+DEFINE_RESERVED_NAME = re.compile(r'#define (errno|_[_A-Z]+)')
+DIRECTIVE_NAME = re.compile(r'#[ ]*([^ (<]*)')
+IDENTIFIER_START = re.compile(r'^[a-zA-Z_]')
+# Words of a verify comment that start with a rule number, words are
+# separated by single spaces
+VERIFY_RULE_WORD = re.compile(r'(?<![^ ])[0-9]+\.[0-9]+[^ ]*')
+
+# Regular expressions for suppressions, rule texts and the summary
+SUPPRESSION_ERROR_ID = re.compile(r'^(misra|MISRA)[_.]([0-9]+)[_.]([0-9]+)')
+SUPPRESSION_LIST_ITEM = re.compile(r'([0-9]+).([0-9]+)')
+RULE_TEXT_RULE = re.compile(r'^Rule ([0-9]+).([0-9]+)')
+RULE_TEXT_SEVERITY = re.compile(r'.*[ ]*(Advisory|Required|Mandatory)$')
+RULE_TEXT_UPPERCASE_LINE = re.compile(r'^[#A-Z].*')
+RULE_TEXT_LOWERCASE_LINE = re.compile(r'^[a-z].*')
+SUMMARY_ID_PARTS = re.compile(r'[\.-]([0-9]*)')
+
+
 class Define:
     def __init__(self, directive):
         self.args = []
         self.expansionList = ''
 
-        res = re.match(r'#define [A-Za-z0-9_]+\(([A-Za-z0-9_,]+)\)[ ]+(.*)', directive.str)
+        res = DEFINE_FUNCTION_MACRO.match(directive.str)
         if res is None:
             return
 
@@ -548,14 +732,10 @@ class Define:
 
 def getAddonRules():
     """Returns dict of MISRA rules handled by this addon."""
-    addon_rules = []
-    compiled = re.compile(r'.*def[ ]+misra_([0-9]+)_([0-9]+)[(].*')
-    for line in open(__file__):
-        res = compiled.match(line)
-        if res is None:
-            continue
-        addon_rules.append(res.group(1) + '.' + res.group(2))
-    return addon_rules
+    with open(__file__) as f:
+        source = f.read()
+    return [major + '.' + minor
+            for major, minor in re.findall(r'def[ ]+misra_([0-9]+)_([0-9]+)[(]', source)]
 
 
 def getCppcheckRules():
@@ -635,32 +815,24 @@ def remove_file_prefix(file_path, prefix):
 class Rule(object):
     """Class to keep rule text and metadata"""
 
-    MISRA_SEVERITY_LEVELS = ['Required', 'Mandatory', 'Advisory']
+    __slots__ = ["num1", "num2", "num", "text", "misra_severity"]
+
+    MISRA_SEVERITY_LEVELS = frozenset(['Required', 'Mandatory', 'Advisory'])
+
+    cppcheck_severity = 'style'
 
     def __init__(self, num1, num2):
         self.num1 = num1
         self.num2 = num2
+        self.num = num1 * 100 + num2
         self.text = ''
         self.misra_severity = ''
 
-    @property
-    def num(self):
-        return self.num1 * 100 + self.num2
-
-    @property
-    def misra_severity(self):
-        return self._misra_severity
-
-    @misra_severity.setter
-    def misra_severity(self, val):
+    def setMisraSeverity(self, val):
         if val in self.MISRA_SEVERITY_LEVELS:
-            self._misra_severity = val
+            self.misra_severity = val
         else:
-            self._misra_severity = ''
-
-    @property
-    def cppcheck_severity(self):
-        return 'style'
+            self.misra_severity = ''
 
     def __repr__(self):
         return "%d.%d (%s)" % (self.num1, self.num2, self.misra_severity)
@@ -669,7 +841,7 @@ class Rule(object):
 class MisraSettings(object):
     """Hold settings for misra.py script."""
 
-    __slots__ = ["verify", "quiet", "show_summary"]
+    __slots__ = ["verify", "quiet", "show_summary", "jobs", "cache_dir"]
 
     def __init__(self, args):
         """
@@ -678,6 +850,8 @@ class MisraSettings(object):
         self.verify = False
         self.quiet = False
         self.show_summary = True
+        self.jobs = 1
+        self.cache_dir = None
 
         if args.verify:
             self.verify = True
@@ -688,9 +862,48 @@ class MisraSettings(object):
             self.quiet = True
         if args.no_summary:
             self.show_summary = False
+        if args.jobs:
+            self.jobs = args.jobs
+        if args.cache_dir:
+            self.cache_dir = os.path.expanduser(args.cache_dir)
+
+
+# Location of a violation read from the result cache or from a worker process
+ReportLocation = collections.namedtuple('ReportLocation', ['file', 'linenr', 'column'])
+
+# Checker used by collectResult() in the worker processes. The workers
+# are forked and inherit it, so the settings and rule texts do not have
+# to be pickled.
+workerChecker = None
+
+
+def collectResult(dumpfile):
+    return workerChecker.collectResult(dumpfile)
 
 
-class MisraChecker:
+def getForkContext():
+    """Returns a multiprocessing context that forks workers, or None if the
+    platform can't fork."""
+    if not hasattr(os, 'fork'):
+        return None
+    # Imported here because it is slow to import and only used with --jobs
+    import multiprocessing
+    try:
+        return multiprocessing.get_context('fork')
+    except AttributeError:
+        # Python 2 always forks
+        return multiprocessing
+
+
+class MisraChecker(object):
+
+    # All attributes are set in __init__(), see there for what they hold
+    __slots__ = ["settings", "verify_expected", "verify_actual", "violations", "errorIds",
+                 "ruleTexts", "ruleInfo", "violationSeverities", "suppressedRules",
+                 "suppressedLocations", "suppressionItems", "dumpfileSuppressions", "filePrefix",
+                 "suppressionFileNames", "suppressionStats", "stdversion", "scopeIndex",
+                 "scopesByType", "tokenPositions", "casts", "functionCalls", "functionMacros",
+                 "gotoLabels", "numSignificantChars", "cachedReports", "collectOnly", "rawLinks"]
 
     def __init__(self, settings, stdversion="c90"):
         """
@@ -704,7 +917,10 @@ class MisraChecker:
         self.verify_actual      = list()
 
         # List of formatted violation messages
-        self.violations         = dict()
+        self.violations         = collections.defaultdict(list)
+
+        # (error id, violation id) of each rule that was reported, see reportError()
+        self.errorIds           = dict()
 
         # if --rule-texts is specified this dictionary
         # is loaded with descriptions of each rule
@@ -712,6 +928,14 @@ class MisraChecker:
         # ie rule 1.2 becomes 102
         self.ruleTexts          = dict()
 
+        # (text, misra severity, cppcheck severity) for each rule in ruleTexts,
+        # built by loadRuleTexts() for reportError()
+        self.ruleInfo           = dict()
+
+        # cppcheck severity for each rule in ruleTexts by violation id
+        # (misra-c2012-X.Y), built by loadRuleTexts() for the summary
+        self.violationSeverities = dict()
+
         # Dictionary of dictionaries for rules to suppress
         # Dict1 is keyed by rule number in the hundreds format of
         # Major *  100 + minor. ie Rule 5.2 = (5*100) + 2
@@ -722,22 +946,185 @@ class MisraChecker:
         # should not be None for both.
         self.suppressedRules    = dict()
 
+        # The same suppressions as a set of (ruleNum, fileName, lineNumber)
+        # for isRuleSuppressed(). fileName is None for a rule that is
+        # suppressed globally, lineNumber is None for a rule that is
+        # suppressed in the entire file.
+        self.suppressedLocations = set()
+
+        # (rule, file name, (line, symbol) or None) for each suppression in
+        # suppressedRules, used to skip duplicates
+        self.suppressionItems = set()
+
         # List of suppression extracted from the dumpfile
         self.dumpfileSuppressions = None
 
         # Prefix to ignore when matching suppression files.
         self.filePrefix = None
 
+        # File paths of checked locations mapped to the file names that
+        # suppressions are matched against, see isRuleSuppressed()
+        self.suppressionFileNames = dict()
+
         # Number of all violations suppressed per rule
         self.suppressionStats   = dict()
 
         self.stdversion = stdversion
 
+        # Variables and scopes grouped by scope, see getScopeIndex()
+        self.scopeIndex = None
+
+        # Scopes of a configuration grouped by type, see getScopesByType()
+        self.scopesByType = None
+
+        # Position of each token of a configuration, see getTokenPositions()
+        self.tokenPositions = None
+
+        # Casts of a configuration, see getCasts()
+        self.casts = None
+
+        # Function calls of a configuration, see getFunctionCalls()
+        self.functionCalls = None
+
+        # Function-like macros of a configuration, see getFunctionMacros()
+        self.functionMacros = None
+
+        # Labels of the gotos in a configuration, see getGotoLabels()
+        self.gotoLabels = None
+
+        # Significant characters of names in a configuration, see
+        # get_num_significant_naming_chars()
+        self.numSignificantChars = None
+
+        # Violations of the current configuration that are stored in the
+        # result cache, see parseDump()
+        self.cachedReports = None
+
+        # Set in worker processes that check whole dump files. The
+        # violations are only collected in cachedReports, see collectResult()
+        self.collectOnly = False
+
+        # Matching brackets in the raw tokens of the current dump file,
+        # see getRawLinks()
+        self.rawLinks = None
+
+    def getScopeIndex(self, cfg):
+        """
+        Return (scopeVars, classScopes) for the configuration.
+        scopeVars maps each scope to the variables declared in it and
+        classScopes maps each scope to the named scopes nested in it.
+        The index is built once per configuration and shared by the
+        misra_5_x checks.
+        """
+        if self.scopeIndex is None or self.scopeIndex[0] is not cfg:
+            scopeVars = {}
+            for var in cfg.variables:
+                if var.nameToken is not None:
+                    scopeVars.setdefault(var.nameToken.scope, []).append(var)
+            classScopes = {}
+            for scope in cfg.scopes:
+                if scope.nestedIn and scope.className:
+                    classScopes.setdefault(scope.nestedIn, []).append(scope)
+            self.scopeIndex = (cfg, scopeVars, classScopes)
+        return self.scopeIndex[1:]
+
+    def getTokens(self, cfg, strs):
+        """
+        Return the tokens of the configuration whose string is one of strs,
+        in token list order. The groups of cfg.tokensByStr() are merged by
+        the position of the tokens, which is looked up once per
+        configuration.
+        """
+        groups = [tokens for tokens in map(cfg.tokensByStr, strs) if tokens]
+        if len(groups) <= 1:
+            return groups[0] if groups else []
+        positions = self.getTokenPositions(cfg)
+        return sorted(itertools.chain(*groups), key=positions.__getitem__)
+
+    def getTokenPositions(self, cfg):
+        """
+        Return a dict that maps each token of the configuration to its
+        position in cfg.tokenlist. The dict is built the first time it is
+        needed for a configuration.
+        """
+        if self.tokenPositions is None or self.tokenPositions[0] is not cfg:
+            positions = {}
+            for position, token in enumerate(cfg.tokenlist):
+                positions[token] = position
+            self.tokenPositions = (cfg, positions)
+        return self.tokenPositions[1]
+
+    def getCasts(self, cfg):
+        """
+        Return the C-style casts of the configuration, in token list order.
+        The casts are shared by the misra_10_8 and misra_11_x checks.
+        """
+        if self.casts is None or self.casts[0] is not cfg:
+            casts = [token for token in cfg.tokensByStr('(') if isCast(token)]
+            self.casts = (cfg, casts, set(casts))
+        return self.casts[1]
+
+    def getCastSet(self, cfg):
+        """
+        Return the C-style casts of the configuration as a set. Looking a
+        token up in it is cheaper than calling isCast() again.
+        """
+        self.getCasts(cfg)
+        return self.casts[2]
+
+    def getScopesByType(self, cfg):
+        """
+        Return a dict that maps each scope type of the configuration to the
+        scopes of that type, in the order of cfg.scopes.
+        """
+        if self.scopesByType is None or self.scopesByType[0] is not cfg:
+            scopesByType = {}
+            for scope in cfg.scopes:
+                scopesByType.setdefault(scope.type, []).append(scope)
+            self.scopesByType = (cfg, scopesByType)
+        return self.scopesByType[1]
+
+    def getFunctionMacros(self, cfg):
+        """
+        Return (directive, Define) for the function-like macro definitions
+        of the configuration. Other directives have an empty Define, which
+        the rule 20.x checks have nothing to look at.
+        """
+        if self.functionMacros is None or self.functionMacros[0] is not cfg:
+            macros = []
+            for directive in cfg.directives:
+                d = Define(directive)
+                if d.args:
+                    macros.append((directive, d))
+            self.functionMacros = (cfg, macros)
+        return self.functionMacros[1]
+
+    def getFunctionCalls(self, cfg):
+        """
+        Return the '(' tokens of the function calls in the configuration,
+        in token list order, see isFunctionCall().
+        """
+        if self.functionCalls is None or self.functionCalls[0] is not cfg:
+            self.functionCalls = (cfg, [token for token in cfg.tokensByStr('(') if isFunctionCall(token)])
+        return self.functionCalls[1]
+
+    def getGotoLabels(self, cfg):
+        if self.gotoLabels is None or self.gotoLabels[0] is not cfg:
+            self.gotoLabels = (cfg, findGotoLabels(cfg.tokenlist))
+        return self.gotoLabels[1]
+
+    def getRawLinks(self, rawTokens):
+        if self.rawLinks is None:
+            self.rawLinks = linkRawTokens(rawTokens)
+        return self.rawLinks
+
     def get_num_significant_naming_chars(self, cfg):
-        if cfg.standards and cfg.standards.c == "c99":
-            return 63
-        else:
-            return 31
+        if self.numSignificantChars is None or self.numSignificantChars[0] is not cfg:
+            if cfg.standards and cfg.standards.c == "c99":
+                self.numSignificantChars = (cfg, 63)
+            else:
+                self.numSignificantChars = (cfg, 31)
+        return self.numSignificantChars[1]
 
     def misra_2_7(self, data):
         for func in data.functions:
@@ -749,8 +1136,8 @@ class MisraChecker:
             for arg in func.argument:
                 func_param_list.append(func.argument[arg])
             # Search for scope of current function
-            for scope in data.scopes:
-                if (scope.type == "Function") and (scope.function == func):
+            for scope in self.getScopesByType(data).get('Function', ()):
+                if scope.function == func:
                     # Search function body: remove referenced function parameter from list
                     token = scope.bodyStart
                     while (token.next != None and token != scope.bodyEnd and len(func_param_list) > 0):
@@ -785,18 +1172,18 @@ class MisraChecker:
 
     def misra_4_1(self, rawTokens):
         for token in rawTokens:
-            if (token.str[0] != '"') and (token.str[0] != '\''):
+            delimiter = token.str[0]
+            if delimiter != '"' and delimiter != '\'':
                 continue
             if len(token.str) < 3:
                 continue
 
-            delimiter = token.str[0]
-            symbols = token.str[1:-1]
-
             # No closing delimiter. This will not compile.
             if token.str[-1] != delimiter:
                 continue
 
+            symbols = token.str[1:-1]
+
             if len(symbols) < 2:
                 continue
 
@@ -837,81 +1224,87 @@ class MisraChecker:
             tokens = long_vars[name_prefix]
             if len(tokens) < 2:
                 continue
-            for tok in sorted(tokens, key=lambda t: (t.linenr, t.column))[1:]:
-                self.reportError(tok, 5, 1)
+            # The first declaration is fine, the others clash with it
+            first = min(tokens, key=lambda t: (t.linenr, t.column))
+            for tok in tokens:
+                if tok is not first:
+                    self.reportError(tok, 5, 1)
 
     def misra_5_2(self, data):
-        scopeVars = {}
-        for var in data.variables:
-            if var.nameToken is None:
-                continue
-            if len(var.nameToken.str) <= 31:
-                continue
-            if var.nameToken.scope not in scopeVars:
-                scopeVars.setdefault(var.nameToken.scope, {})["varlist"] = []
-                scopeVars.setdefault(var.nameToken.scope, {})["scopelist"] = []
-            scopeVars[var.nameToken.scope]["varlist"].append(var)
-        for scope in data.scopes:
-            if scope.nestedIn and scope.className:
-                if scope.nestedIn not in scopeVars:
-                    scopeVars.setdefault(scope.nestedIn, {})["varlist"] = []
-                    scopeVars.setdefault(scope.nestedIn, {})["scopelist"] = []
-                scopeVars[scope.nestedIn]["scopelist"].append(scope)
-        for scope in scopeVars:
-            if len(scopeVars[scope]["varlist"]) <= 1:
-                continue
-            for i, variable1 in enumerate(scopeVars[scope]["varlist"]):
-                for variable2 in scopeVars[scope]["varlist"][i + 1:]:
+        scopeVars, classScopes = self.getScopeIndex(data)
+        scopes = itertools.chain(scopeVars, [scope for scope in classScopes if scope not in scopeVars])
+        for scope in scopes:
+            varlist = [var for var in scopeVars.get(scope, []) if len(var.nameToken.str) > 31]
+            scopelist = classScopes.get(scope, [])
+            if len(varlist) <= 1:
+                continue
+            # Only names with the same 31 character prefix can clash, so
+            # group them by prefix instead of comparing all pairs.
+            varBuckets = {}
+            for var in varlist:
+                varBuckets.setdefault(var.nameToken.str[:31], []).append(var)
+            scopeBuckets = {}
+            for innerscope in scopelist:
+                scopeBuckets.setdefault(innerscope.className[:31], []).append(innerscope)
+            for variable1 in varlist:
+                name1 = variable1.nameToken.str[:31]
+                # Drop variable1 from its bucket, what is left are the
+                # variables after it in varlist
+                bucket = varBuckets[name1]
+                bucket.pop(0)
+                for variable2 in bucket:
                     if variable1.isArgument and variable2.isArgument:
                         continue
                     if hasExternalLinkage(variable1) or hasExternalLinkage(variable2):
                         continue
-                    if (variable1.nameToken.str[:31] == variable2.nameToken.str[:31] and
-                            variable1.Id != variable2.Id):
-                        if int(variable1.nameToken.linenr) > int(variable2.nameToken.linenr):
+                    if variable1.Id != variable2.Id:
+                        if variable1.nameToken.linenr > variable2.nameToken.linenr:
                             self.reportError(variable1.nameToken, 5, 2)
                         else:
                             self.reportError(variable2.nameToken, 5, 2)
-                for innerscope in scopeVars[scope]["scopelist"]:
-                    if variable1.nameToken.str[:31] == innerscope.className[:31]:
-                        if int(variable1.nameToken.linenr) > int(innerscope.bodyStart.linenr):
-                            self.reportError(variable1.nameToken, 5, 2)
-                        else:
-                            self.reportError(innerscope.bodyStart, 5, 2)
-            if len(scopeVars[scope]["scopelist"]) <= 1:
-                continue
-            for i, scopename1 in enumerate(scopeVars[scope]["scopelist"]):
-                for scopename2 in scopeVars[scope]["scopelist"][i + 1:]:
-                    if scopename1.className[:31] == scopename2.className[:31]:
-                        if int(scopename1.bodyStart.linenr) > int(scopename2.bodyStart.linenr):
-                            self.reportError(scopename1.bodyStart, 5, 2)
-                        else:
-                            self.reportError(scopename2.bodyStart, 5, 2)
+                for innerscope in scopeBuckets.get(name1, []):
+                    if variable1.nameToken.linenr > innerscope.bodyStart.linenr:
+                        self.reportError(variable1.nameToken, 5, 2)
+                    else:
+                        self.reportError(innerscope.bodyStart, 5, 2)
+            if len(scopelist) <= 1:
+                continue
+            for scopename1 in scopelist:
+                bucket = scopeBuckets[scopename1.className[:31]]
+                bucket.pop(0)
+                for scopename2 in bucket:
+                    if scopename1.bodyStart.linenr > scopename2.bodyStart.linenr:
+                        self.reportError(scopename1.bodyStart, 5, 2)
+                    else:
+                        self.reportError(scopename2.bodyStart, 5, 2)
 
     def misra_5_3(self, data):
         num_sign_chars = self.get_num_significant_naming_chars(data)
-        enum = []
-        scopeVars = {}
-        for var in data.variables:
-            if var.nameToken is not None:
-                if var.nameToken.scope not in scopeVars:
-                    scopeVars[var.nameToken.scope] = []
-                scopeVars[var.nameToken.scope].append(var)
+        scopeVars = self.getScopeIndex(data)[0]
+
+        # The variables of each scope grouped by their significant name
+        # prefix. The prefixes are interned so that the many lookups below
+        # compare them by identity.
+        scopePrefixes = {}
+        for scope, variables in scopeVars.items():
+            buckets = scopePrefixes[scope] = {}
+            for var in variables:
+                buckets.setdefault(intern(var.nameToken.str[:num_sign_chars]), []).append(var)
 
         map_scopes = {}
         for scope in data.scopes:
             if scope.className:
-                s_name = scope.className[:num_sign_chars]
+                s_name = intern(scope.className[:num_sign_chars])
                 if s_name not in map_scopes:
                     map_scopes[s_name] = []
                 map_scopes[s_name].append(scope)
-        enum = {}
+        enum = set()
         for innerScope in data.scopes:
             if innerScope.type == "Enum":
                 enum_token = innerScope.bodyStart.next
                 while enum_token != innerScope.bodyEnd:
                     if enum_token.values and enum_token.isName:
-                        enum[enum_token.str[:num_sign_chars]]=1
+                        enum.add(intern(enum_token.str[:num_sign_chars]))
                     enum_token = enum_token.next
                 continue
             if innerScope not in scopeVars:
@@ -919,29 +1312,29 @@ class MisraChecker:
             if innerScope.type == "Global":
                 continue
             for innerVar in scopeVars[innerScope]:
+                innerName = intern(innerVar.nameToken.str[:num_sign_chars])
                 outerScope = innerScope.nestedIn
                 while outerScope:
-                    if outerScope not in scopeVars:
+                    if outerScope not in scopePrefixes:
                         outerScope = outerScope.nestedIn
                         continue
-                    for outerVar in scopeVars[outerScope]:
-                        if innerVar.nameToken.str[:num_sign_chars] == outerVar.nameToken.str[:num_sign_chars]:
-                            if outerVar.isArgument and outerScope.type == "Global" and not innerVar.isArgument:
-                                continue
-                            if int(innerVar.nameToken.linenr) > int(outerVar.nameToken.linenr):
-                                self.reportError(innerVar.nameToken, 5, 3)
-                            else:
-                                self.reportError(outerVar.nameToken, 5, 3)
+                    for outerVar in scopePrefixes[outerScope].get(innerName, ()):
+                        if outerVar.isArgument and outerScope.type == "Global" and not innerVar.isArgument:
+                            continue
+                        if innerVar.nameToken.linenr > outerVar.nameToken.linenr:
+                            self.reportError(innerVar.nameToken, 5, 3)
+                        else:
+                            self.reportError(outerVar.nameToken, 5, 3)
                     outerScope = outerScope.nestedIn
-                if innerVar.nameToken.str[:num_sign_chars] in map_scopes:
-                    for scope in map_scopes[innerVar.nameToken.str[:num_sign_chars]]:
-                        if int(innerVar.nameToken.linenr) > int(scope.bodyStart.linenr):
+                if innerName in map_scopes:
+                    for scope in map_scopes[innerName]:
+                        if innerVar.nameToken.linenr > scope.bodyStart.linenr:
                             self.reportError(innerVar.nameToken, 5, 3)
                         else:
                             self.reportError(scope.bodyStart, 5, 3)
 
-                if innerVar.nameToken.str[:num_sign_chars] in enum:
-                    if int(innerVar.nameToken.linenr) > int(innerScope.bodyStart.linenr):
+                if innerName in enum:
+                    if innerVar.nameToken.linenr > innerScope.bodyStart.linenr:
                         self.reportError(innerVar.nameToken, 5, 3)
                     else:
                         self.reportError(innerScope.bodyStart, 5, 3)
@@ -952,39 +1345,40 @@ class MisraChecker:
     def misra_5_4(self, data):
         num_sign_chars = self.get_num_significant_naming_chars(data)
         macro = {}
-        compile_name = re.compile(r'#define ([a-zA-Z0-9_]+)')
-        compile_param = re.compile(r'#define ([a-zA-Z0-9_]+)[(]([a-zA-Z0-9_, ]+)[)]')
         short_names={}
         macro_w_arg = []
         for dir in data.directives:
-            res1 = compile_name.match(dir.str)
+            res1 = DEFINE_NAME_PARAMS.match(dir.str)
             if res1:
-                if dir not in macro:
-                    macro.setdefault(dir, {})["name"] = []
-                    macro.setdefault(dir, {})["params"] = []
                 full_name = res1.group(1)
-                macro[dir]["name"] = full_name
-                short_name = full_name[:num_sign_chars]
+                if dir not in macro:
+                    macro[dir] = {"name": full_name, "params": []}
+                else:
+                    macro[dir]["name"] = full_name
+                short_name = intern(full_name[:num_sign_chars])
                 if short_name in short_names:
                     _dir = short_names[short_name]
                     if full_name != macro[_dir]["name"]:
                         self.reportError(dir, 5, 4)
                 else:
                     short_names[short_name]=dir
-            res2 = compile_param.match(dir.str)
-            if res2:
-                res_gp2 = res2.group(2).split(",")
-                res_gp2 = [macroname.replace(" ", "") for macroname in res_gp2]
-                macro[dir]["params"].extend(res_gp2)
-                macro_w_arg.append(dir)
+                if res1.group(2):
+                    res_gp2 = res1.group(2).split(",")
+                    res_gp2 = [macroname.replace(" ", "") for macroname in res_gp2]
+                    macro[dir]["params"].extend(res_gp2)
+                    macro_w_arg.append(dir)
         for mvar in macro_w_arg:
-            for i, macroparam1 in enumerate(macro[mvar]["params"]):
-                for j, macroparam2 in enumerate(macro[mvar]["params"]):
-                    if j > i and macroparam1[:num_sign_chars] == macroparam2[:num_sign_chars]:
-                        self.reportError(mvar, 5, 4)
-                param = macroparam1
-                if  param[:num_sign_chars] in short_names:
-                    m_var1=short_names[param[:num_sign_chars]]
+            prefixes = [intern(param[:num_sign_chars]) for param in macro[mvar]["params"]]
+            # Number of parameters after the current one with the same prefix
+            remaining = {}
+            for prefix in prefixes:
+                remaining[prefix] = remaining.get(prefix, 0) + 1
+            for prefix in prefixes:
+                remaining[prefix] -= 1
+                for _ in range(remaining[prefix]):
+                    self.reportError(mvar, 5, 4)
+                if prefix in short_names:
+                    m_var1=short_names[prefix]
                     if m_var1.linenr > mvar.linenr:
                         self.reportError(m_var1, 5, 4)
                     else:
@@ -992,12 +1386,11 @@ class MisraChecker:
 
     def misra_5_5(self, data):
         num_sign_chars = self.get_num_significant_naming_chars(data)
-        macroNames = {}
-        compiled = re.compile(r'#define ([A-Za-z0-9_]+)')
+        macroNames = set()
         for dir in data.directives:
-            res = compiled.match(dir.str)
+            res = DEFINE_NAME.match(dir.str)
             if res:
-                macroNames[res.group(1)[:num_sign_chars]]=dir
+                macroNames.add(intern(res.group(1)[:num_sign_chars]))
         for var in data.variables:
             if var.nameToken and var.nameToken.str[:num_sign_chars] in macroNames:
                         self.reportError(var.nameToken, 5, 5)
@@ -1006,15 +1399,16 @@ class MisraChecker:
                     self.reportError(scope.bodyStart, 5, 5)
 
     def misra_7_1(self, rawTokens):
-        compiled = re.compile(r'^0[0-7]+$')
         for tok in rawTokens:
-            if compiled.match(tok.str):
+            # Octal constant: 0 followed by octal digits
+            if tok.str[0] == '0' and len(tok.str) > 1 and OCT_DIGITS.issuperset(tok.str[1:]):
                 self.reportError(tok, 7, 1)
 
     def misra_7_3(self, rawTokens):
-        compiled = re.compile(r'^[0-9.uU]+l')
         for tok in rawTokens:
-            if compiled.match(tok.str):
+            # Lowercase 'l' right after the digits (and 'u' suffix) of a number
+            suffix = tok.str.lstrip('0123456789.uU')
+            if suffix[:1] == 'l' and len(suffix) < len(tok.str):
                 self.reportError(tok, 7, 3)
 
     def misra_8_11(self, data):
@@ -1023,9 +1417,7 @@ class MisraChecker:
                 self.reportError(var.nameToken, 8, 11)
 
     def misra_8_12(self, data):
-        for scope in data.scopes:
-            if scope.type != 'Enum':
-                continue
+        for scope in self.getScopesByType(data).get('Enum', ()):
             enum_values = []
             implicit_enum_values = []
             e_token = scope.bodyStart.next
@@ -1033,7 +1425,7 @@ class MisraChecker:
                 if e_token.str == '(':
                     e_token = e_token.link
                     continue
-                if type(e_token.previous.str) is str and not e_token.previous.str in ',{':
+                if e_token.previous.str not in (',', '{'):
                     e_token = e_token.next
                     continue
                 if e_token.isName and e_token.values and e_token.valueType and e_token.valueType.typeScope == scope:
@@ -1042,8 +1434,9 @@ class MisraChecker:
                     if e_token.next.str != "=":
                         implicit_enum_values += token_values
                 e_token = e_token.next
+            counts = collections.Counter(enum_values)
             for implicit_enum_value in implicit_enum_values:
-                if enum_values.count(implicit_enum_value) != 1:
+                if counts[implicit_enum_value] != 1:
                     self.reportError(scope.bodyStart, 8, 12)
 
     def misra_8_14(self, rawTokens):
@@ -1053,41 +1446,44 @@ class MisraChecker:
 
     def misra_9_5(self, rawTokens):
         for token in rawTokens:
-            if simpleMatch(token, '[ ] = { ['):
+            if token.str == '[' and matchSequence(token, ARRAY_DESIGNATED_INITIALIZER):
                 self.reportError(token, 9, 5)
 
     def misra_10_1(self, data):
-        for token in data.tokenlist:
-            if not token.isOp:
-                continue
+        # Only shifts are checked, so don't compute the essential types
+        # of the other operators
+        for token in self.getTokens(data, ('<<', '>>')):
             e1 = getEssentialTypeCategory(token.astOperand1)
             e2 = getEssentialTypeCategory(token.astOperand2)
             if not e1 or not e2:
                 continue
-            if token.str in ['<<', '>>']:
-                if e1 != 'unsigned':
-                    self.reportError(token, 10, 1)
-                elif e2 != 'unsigned' and not token.astOperand2.isNumber:
-                    self.reportError(token, 10, 1)
+            if e1 != 'unsigned':
+                self.reportError(token, 10, 1)
+            elif e2 != 'unsigned' and not token.astOperand2.isNumber:
+                self.reportError(token, 10, 1)
 
     def misra_10_4(self, data):
-        op = {'+', '-', '*', '/', '%', '&', '|', '^', '+=', '-=', ':'}
+        op = ARITHMETIC_OPERATORS
         for token in data.tokenlist:
             if token.str not in op and not token.isComparisonOp:
                 continue
-            if not token.astOperand1 or not token.astOperand2:
-                continue
-            if not token.astOperand1.valueType or not token.astOperand2.valueType:
-                continue
-            if ((token.astOperand1.str in op or token.astOperand1.isComparisonOp) and
-                    (token.astOperand2.str in op or token.astOperand1.isComparisonOp)):
-                e1, e2 = getEssentialCategorylist(token.astOperand1.astOperand2, token.astOperand2.astOperand1)
-            elif token.astOperand1.str in op or token.astOperand1.isComparisonOp:
-                e1, e2 = getEssentialCategorylist(token.astOperand1.astOperand2, token.astOperand2)
-            elif token.astOperand2.str in op or token.astOperand2.isComparisonOp:
-                e1, e2 = getEssentialCategorylist(token.astOperand1, token.astOperand2.astOperand1)
+            operand1 = token.astOperand1
+            operand2 = token.astOperand2
+            if not operand1 or not operand2:
+                continue
+            if not operand1.valueType or not operand2.valueType:
+                continue
+            # Compare the operands that are next to the operator when the
+            # operands are themselves operations
+            isOperation1 = operand1.str in op or operand1.isComparisonOp
+            if isOperation1 and (operand2.str in op or operand1.isComparisonOp):
+                e1, e2 = getEssentialCategorylist(operand1.astOperand2, operand2.astOperand1)
+            elif isOperation1:
+                e1, e2 = getEssentialCategorylist(operand1.astOperand2, operand2)
+            elif operand2.str in op or operand2.isComparisonOp:
+                e1, e2 = getEssentialCategorylist(operand1, operand2.astOperand1)
             else:
-                e1, e2 = getEssentialCategorylist(token.astOperand1, token.astOperand2)
+                e1, e2 = getEssentialCategorylist(operand1, operand2)
             if token.str == "+=" or token.str == "+":
                 if e1 == "char" and (e2 == "signed" or e2 == "unsigned"):
                     continue
@@ -1104,10 +1500,10 @@ class MisraChecker:
                 self.reportError(token, 10, 4)
 
     def misra_10_6(self, data):
-        for token in data.tokenlist:
-            if token.str != '=' or not token.astOperand1 or not token.astOperand2:
+        for token in data.tokensByStr('='):
+            if not token.astOperand1 or not token.astOperand2:
                 continue
-            if (token.astOperand2.str not in ('+', '-', '*', '/', '%', '&', '|', '^', '>>', "<<", "?", ":", '~') and
+            if (token.astOperand2.str not in COMPOSITE_OPERATORS and
                     not isCast(token.astOperand2)):
                 continue
             vt1 = token.astOperand1.valueType
@@ -1116,32 +1512,28 @@ class MisraChecker:
                 continue
             if not vt2 or vt2.pointer > 0:
                 continue
-            try:
-                intTypes = ['char', 'short', 'int', 'long', 'long long']
-                index1 = intTypes.index(vt1.type)
-                if isCast(token.astOperand2):
-                    e = vt2.type
-                else:
-                    e = getEssentialType(token.astOperand2)
-                if not e:
-                    continue
-                index2 = intTypes.index(e)
-                if index1 > index2:
-                    self.reportError(token, 10, 6)
-            except ValueError:
-                pass
+            index1 = INTEGER_TYPE_RANKS.get(vt1.type)
+            if index1 is None:
+                continue
+            if isCast(token.astOperand2):
+                e = vt2.type
+            else:
+                e = getEssentialType(token.astOperand2)
+            if not e:
+                continue
+            index2 = INTEGER_TYPE_RANKS.get(e)
+            if index2 is not None and index1 > index2:
+                self.reportError(token, 10, 6)
 
     def misra_10_8(self, data):
-        for token in data.tokenlist:
-            if not isCast(token):
-                continue
+        for token in self.getCasts(data):
             if not token.valueType or token.valueType.pointer > 0:
                 continue
             if not token.astOperand1.valueType or token.astOperand1.valueType.pointer > 0:
                 continue
             if not token.astOperand1.astOperand1:
                 continue
-            if token.astOperand1.str not in ('+', '-', '*', '/', '%', '&', '|', '^', '>>', "<<", "?", ":", '~'):
+            if token.astOperand1.str not in COMPOSITE_OPERATORS:
                 continue
             if token.astOperand1.str != '~' and not token.astOperand1.astOperand2:
                 continue
@@ -1155,22 +1547,18 @@ class MisraChecker:
             if e1 != e2:
                 self.reportError(token, 10, 8)
             else:
-                try:
-                    intTypes = ['char', 'short', 'int', 'long', 'long long']
-                    index1 = intTypes.index(token.valueType.type)
-                    e = getEssentialType(token.astOperand1)
-                    if not e:
-                        continue
-                    index2 = intTypes.index(e)
-                    if index1 > index2:
-                        self.reportError(token, 10, 8)
-                except ValueError:
-                    pass
+                index1 = INTEGER_TYPE_RANKS.get(token.valueType.type)
+                if index1 is None:
+                    continue
+                e = getEssentialType(token.astOperand1)
+                if not e:
+                    continue
+                index2 = INTEGER_TYPE_RANKS.get(e)
+                if index2 is not None and index1 > index2:
+                    self.reportError(token, 10, 8)
 
     def misra_11_3(self, data):
-        for token in data.tokenlist:
-            if not isCast(token):
-                continue
+        for token in self.getCasts(data):
             vt1 = token.valueType
             vt2 = token.astOperand1.valueType
             if not vt1 or not vt2:
@@ -1186,9 +1574,7 @@ class MisraChecker:
                 self.reportError(token, 11, 3)
 
     def misra_11_4(self, data):
-        for token in data.tokenlist:
-            if not isCast(token):
-                continue
+        for token in self.getCasts(data):
             vt1 = token.valueType
             vt2 = token.astOperand1.valueType
             if not vt1 or not vt2:
@@ -1199,8 +1585,9 @@ class MisraChecker:
                 self.reportError(token, 11, 4)
 
     def misra_11_5(self, data):
+        casts = self.getCastSet(data)
         for token in data.tokenlist:
-            if not isCast(token):
+            if token not in casts:
                 if token.astOperand1 and token.astOperand2 and token.str == "=" and token.next.str != "(":
                     vt1 = token.astOperand1.valueType
                     vt2 = token.astOperand2.valueType
@@ -1209,7 +1596,7 @@ class MisraChecker:
                     if vt1.pointer > 0 and vt1.type != 'void' and vt2.pointer == vt1.pointer and vt2.type == 'void':
                         self.reportError(token, 11, 5)
                 continue
-            if token.astOperand1.astOperand1 and token.astOperand1.astOperand1.str in ('malloc', 'calloc', 'realloc', 'free'):
+            if token.astOperand1.astOperand1 and token.astOperand1.astOperand1.str in DYNAMIC_MEMORY_FUNCTIONS:
                 continue
             vt1 = token.valueType
             vt2 = token.astOperand1.valueType
@@ -1219,9 +1606,7 @@ class MisraChecker:
                 self.reportError(token, 11, 5)
 
     def misra_11_6(self, data):
-        for token in data.tokenlist:
-            if not isCast(token):
-                continue
+        for token in self.getCasts(data):
             if token.astOperand1.astOperand1:
                 continue
             vt1 = token.valueType
@@ -1234,9 +1619,7 @@ class MisraChecker:
                 self.reportError(token, 11, 6)
 
     def misra_11_7(self, data):
-        for token in data.tokenlist:
-            if not isCast(token):
-                continue
+        for token in self.getCasts(data):
             vt1 = token.valueType
             vt2 = token.astOperand1.valueType
             if not vt1 or not vt2:
@@ -1254,8 +1637,9 @@ class MisraChecker:
 
     def misra_11_8(self, data):
         # TODO: reuse code in CERT-EXP05
-        for token in data.tokenlist:
-            if isCast(token):
+        casts = self.getCastSet(data)
+        for token in data.tokensByStr('('):
+            if token in casts:
                 # C-style cast
                 if not token.valueType:
                     continue
@@ -1270,7 +1654,7 @@ class MisraChecker:
                 if (const1 % 2) < (const2 % 2):
                     self.reportError(token, 11, 8)
 
-            elif token.str == '(' and token.astOperand1 and token.astOperand2 and token.astOperand1.function:
+            elif token.astOperand1 and token.astOperand2 and token.astOperand1.function:
                 # Function call
                 function = token.astOperand1.function
                 arguments = getArguments(token)
@@ -1290,8 +1674,8 @@ class MisraChecker:
                         self.reportError(token, 11, 8)
 
     def misra_11_9(self, data):
-        for token in data.tokenlist:
-            if token.astOperand1 and token.astOperand2 and token.str in ["=", "==", "!=", "?", ":"]:
+        for token in self.getTokens(data, ('=', '==', '!=', '?', ':')):
+            if token.astOperand1 and token.astOperand2:
                 vt1 = token.astOperand1.valueType
                 vt2 = token.astOperand2.valueType
                 if not vt1 or not vt2:
@@ -1305,23 +1689,27 @@ class MisraChecker:
                             self.reportError(token, 11, 9)
 
     def misra_12_1_sizeof(self, rawTokens):
-        state = 0
-        compiled = re.compile(r'^[a-zA-Z_]')
-        for tok in rawTokens:
-            if tok.str.startswith('//') or tok.str.startswith('/*'):
-                continue
-            if tok.str == 'sizeof':
-                state = 1
-            elif state == 1:
-                if compiled.match(tok.str):
-                    state = 2
-                else:
-                    state = 0
-            elif state == 2:
-                if tok.str in ('+', '-', '*', '/', '%'):
+        # Only the tokens after a sizeof are of interest, so find those
+        # first instead of running a state machine over all tokens
+        sizeofs = [i for i, tok in enumerate(rawTokens) if tok.str == 'sizeof']
+        count = len(rawTokens)
+        for i in sizeofs:
+            operandSeen = False
+            j = i + 1
+            while j < count:
+                tok = rawTokens[j]
+                j += 1
+                if tok.str.startswith(COMMENT_PREFIXES):
+                    continue
+                if not operandSeen:
+                    # A nested sizeof is handled on its own
+                    if tok.str == 'sizeof' or not IDENTIFIER_START.match(tok.str):
+                        break
+                    operandSeen = True
+                elif tok.str in ('+', '-', '*', '/', '%'):
                     self.reportError(tok, 12, 1)
                 else:
-                    state = 0
+                    break
 
     def misra_12_1(self, data):
         for token in data.tokenlist:
@@ -1338,9 +1726,7 @@ class MisraChecker:
                 continue
 
     def misra_12_2(self, data):
-        for token in data.tokenlist:
-            if not (token.str in ('<<', '>>')):
-                continue
+        for token in self.getTokens(data, ('<<', '>>')):
             if (not token.astOperand2) or (not token.astOperand2.values):
                 continue
             maxval = 0
@@ -1356,9 +1742,8 @@ class MisraChecker:
                 self.reportError(token, 12, 2)
 
     def misra_12_3(self, data):
-        for token in data.tokenlist:
-            if token.str != ',' or token.scope.type == 'Enum' or \
-                    token.scope.type == 'Class' or token.scope.type == 'Global':
+        for token in data.tokensByStr(','):
+            if token.scope.type == 'Enum' or token.scope.type == 'Class' or token.scope.type == 'Global':
                 continue
             if token.astParent and token.astParent.str in ['(', ',', '{']:
                 continue
@@ -1383,17 +1768,15 @@ class MisraChecker:
                     break
 
     def misra_13_1(self, data):
-        for token in data.tokenlist:
-            if not simpleMatch(token, '= {'):
+        for token in data.tokensByStr('='):
+            if not token.next or token.next.str != '{':
                 continue
             init = token.next
             if hasSideEffectsRecursive(init):
                 self.reportError(init, 13, 1)
 
     def misra_13_3(self, data):
-        for token in data.tokenlist:
-            if token.str not in ('++', '--'):
-                continue
+        for token in self.getTokens(data, ('++', '--')):
             astTop = token
             while astTop.astParent and astTop.astParent.str not in (',', ';'):
                 astTop = astTop.astParent
@@ -1401,9 +1784,7 @@ class MisraChecker:
                 self.reportError(astTop, 13, 3)
 
     def misra_13_4(self, data):
-        for token in data.tokenlist:
-            if token.str != '=':
-                continue
+        for token in data.tokensByStr('='):
             if not token.astParent:
                 continue
             if token.astOperand1.str == '[' and token.astOperand1.previous.str in ('{', ','):
@@ -1412,17 +1793,17 @@ class MisraChecker:
                 self.reportError(token, 13, 4)
 
     def misra_13_5(self, data):
-        for token in data.tokenlist:
+        for token in self.getTokens(data, ('&&', '||')):
             if token.isLogicalOp and hasSideEffectsRecursive(token.astOperand2):
                 self.reportError(token, 13, 5)
 
     def misra_13_6(self, data):
-        for token in data.tokenlist:
-            if token.str == 'sizeof' and hasSideEffectsRecursive(token.next):
+        for token in data.tokensByStr('sizeof'):
+            if hasSideEffectsRecursive(token.next):
                 self.reportError(token, 13, 6)
 
     def misra_14_1(self, data):
-        for token in data.tokenlist:
+        for token in self.getTokens(data, ('for', 'while')):
             if token.str == 'for':
                 exprs = getForLoopExpressions(token)
                 if not exprs:
@@ -1435,7 +1816,7 @@ class MisraChecker:
                     self.reportError(token, 14, 1)
 
     def misra_14_2(self, data):
-        for token in data.tokenlist:
+        for token in data.tokensByStr('for'):
             expressions = getForLoopExpressions(token)
             if not expressions:
                 continue
@@ -1445,35 +1826,30 @@ class MisraChecker:
                 self.reportError(token, 14, 2)
 
     def misra_14_4(self, data):
-        for token in data.tokenlist:
-            if token.str != '(':
-                continue
+        for token in data.tokensByStr('('):
             if not token.astOperand1 or not (token.astOperand1.str in ['if', 'while']):
                 continue
             if not isBoolExpression(token.astOperand2):
                 self.reportError(token, 14, 4)
 
     def misra_15_1(self, data):
-        for token in data.tokenlist:
-            if token.str == "goto":
-                self.reportError(token, 15, 1)
+        for token in data.tokensByStr('goto'):
+            self.reportError(token, 15, 1)
 
     def misra_15_2(self, data):
-        for token in data.tokenlist:
-            if token.str != 'goto':
-                continue
+        gotoLabels = self.getGotoLabels(data)
+        for token in data.tokensByStr('goto'):
             if (not token.next) or (not token.next.isName):
                 continue
-            if not findGotoLabel(token):
+            if token not in gotoLabels:
                 self.reportError(token, 15, 2)
 
     def misra_15_3(self, data):
-        for token in data.tokenlist:
-            if token.str != 'goto':
-                continue
+        gotoLabels = self.getGotoLabels(data)
+        for token in data.tokensByStr('goto'):
             if (not token.next) or (not token.next.isName):
                 continue
-            tok = findGotoLabel(token)
+            tok = gotoLabels.get(token)
             if not tok:
                 continue
             scope = token.scope
@@ -1483,11 +1859,12 @@ class MisraChecker:
                 self.reportError(token, 15, 3)
 
     def misra_15_5(self, data):
-        for token in data.tokenlist:
-            if token.str == 'return' and token.scope.type != 'Function':
+        for token in data.tokensByStr('return'):
+            if token.scope.type != 'Function':
                 self.reportError(token, 15, 5)
 
     def misra_15_6(self, rawTokens):
+        rawLinks = self.getRawLinks(rawTokens)
         state = 0
         indent = 0
         tok1 = None
@@ -1497,7 +1874,7 @@ class MisraChecker:
                     continue
                 if simpleMatch(token.previous, "} while"):
                     # is there a 'do { .. } while'?
-                    start = rawlink(token.previous)
+                    start = rawLinks.get(token.previous)
                     if start and simpleMatch(start.previous, 'do {'):
                         continue
                 if state == 2:
@@ -1528,16 +1905,14 @@ class MisraChecker:
                         state = 2
                     indent = indent - 1
             elif state == 2:
-                if token.str.startswith('//') or token.str.startswith('/*'):
+                if token.str.startswith(COMMENT_PREFIXES):
                     continue
                 state = 0
                 if token.str != '{':
                     self.reportError(tok1, 15, 6)
 
     def misra_15_7(self, data):
-        for scope in data.scopes:
-            if scope.type != 'Else':
-                continue
+        for scope in self.getScopesByType(data).get('Else', ()):
             if not simpleMatch(scope.bodyStart, '{ if ('):
                 continue
             if scope.bodyStart.column > 0:
@@ -1552,8 +1927,8 @@ class MisraChecker:
     # TODO add 16.1 rule
 
     def misra_16_2(self, data):
-        for token in data.tokenlist:
-            if token.str == 'case' and token.scope.type != 'Switch':
+        for token in data.tokensByStr('case'):
+            if token.scope.type != 'Switch':
                 self.reportError(token, 16, 2)
 
     def misra_16_3(self, rawTokens):
@@ -1562,52 +1937,52 @@ class MisraChecker:
         STATE_OK = 2     # a case/default is allowed (we have seen 'break;'/'comment'/'{'/attribute)
         STATE_SWITCH = 3 # walking through switch statement scope
 
+        rawLinks = self.getRawLinks(rawTokens)
         state = STATE_NONE
         end_swtich_token = None  # end '}' for the switch scope
         for token in rawTokens:
+            tokStr = token.str
             # Find switch scope borders
-            if token.str == 'switch':
+            if tokStr == 'switch':
                 state = STATE_SWITCH
             if state == STATE_SWITCH:
-                if token.str == '{':
-                    end_swtich_token = findRawLink(token)
+                if tokStr == '{':
+                    end_swtich_token = rawLinks.get(token)
                 else:
                     continue
 
-            if token.str == 'break' or token.str == 'return' or token.str == 'throw':
+            if tokStr in ('break', 'return', 'throw'):
                 state = STATE_BREAK
-            elif token.str == ';':
+            elif tokStr == ';':
                 if state == STATE_BREAK:
                     state = STATE_OK
                 elif token.next and token.next == end_swtich_token:
                     self.reportError(token.next, 16, 3)
                 else:
                     state = STATE_NONE
-            elif token.str.startswith('/*') or token.str.startswith('//'):
-                if 'fallthrough' in token.str.lower():
+            elif tokStr.startswith(COMMENT_PREFIXES):
+                if 'fallthrough' in tokStr.lower():
                     state = STATE_OK
-            elif simpleMatch(token, '[ [ fallthrough ] ] ;'):
+            elif tokStr == '[' and matchSequence(token, FALLTHROUGH_ATTRIBUTE):
                 state = STATE_BREAK
-            elif token.str == '{':
+            elif tokStr == '{':
                 state = STATE_OK
-            elif token.str == '}' and state == STATE_OK:
+            elif tokStr == '}' and state == STATE_OK:
                 # is this {} an unconditional block of code?
-                prev = findRawLink(token)
+                prev = rawLinks.get(token)
                 if prev:
                     prev = prev.previous
-                    while prev and prev.str[:2] in ('//', '/*'):
+                    while prev and prev.str.startswith(COMMENT_PREFIXES):
                         prev = prev.previous
                 if (prev is None) or (prev.str not in ':;{}'):
                     state = STATE_NONE
-            elif token.str == 'case' or token.str == 'default':
+            elif tokStr in ('case', 'default'):
                 if state != STATE_OK:
                     self.reportError(token, 16, 3)
                 state = STATE_OK
 
     def misra_16_4(self, data):
-        for token in data.tokenlist:
-            if token.str != 'switch':
-                continue
+        for token in data.tokensByStr('switch'):
             if not simpleMatch(token, 'switch ('):
                 continue
             if not simpleMatch(token.next.link, ') {'):
@@ -1624,9 +1999,7 @@ class MisraChecker:
                 self.reportError(token, 16, 4)
 
     def misra_16_5(self, data):
-        for token in data.tokenlist:
-            if token.str != 'default':
-                continue
+        for token in data.tokensByStr('default'):
             if token.previous and token.previous.str == '{':
                 continue
             tok2 = token
@@ -1640,8 +2013,10 @@ class MisraChecker:
                 self.reportError(token, 16, 5)
 
     def misra_16_6(self, data):
-        for token in data.tokenlist:
-            if not (simpleMatch(token, 'switch (') and simpleMatch(token.next.link, ') {')):
+        for token in data.tokensByStr('switch'):
+            if not token.next or token.next.str != '(':
+                continue
+            if not simpleMatch(token.next.link, ') {'):
                 continue
             tok = token.next.link.next.next
             count = 0
@@ -1659,70 +2034,60 @@ class MisraChecker:
                 self.reportError(token, 16, 6)
 
     def misra_16_7(self, data):
-        for token in data.tokenlist:
-            if simpleMatch(token, 'switch (') and isBoolExpression(token.next.astOperand2):
+        for token in data.tokensByStr('switch'):
+            if token.next and token.next.str == '(' and isBoolExpression(token.next.astOperand2):
                 self.reportError(token, 16, 7)
 
     def misra_17_1(self, data):
-        for token in data.tokenlist:
-            if isFunctionCall(token) and token.astOperand1.str in ('va_list', 'va_arg', 'va_start', 'va_end', 'va_copy'):
+        for token in self.getTokens(data, ('(', 'va_list')):
+            if isFunctionCall(token) and token.astOperand1.str in VARIADIC_ARGUMENT_NAMES:
                 self.reportError(token, 17, 1)
             elif token.str == 'va_list':
                 self.reportError(token, 17, 1)
 
     def misra_17_2(self, data):
-        # find recursions..
-        def find_recursive_call(search_for_function, direct_call, calls_map, visited=None):
-            if visited is None:
-                visited = set()
-            if direct_call == search_for_function:
-                return True
-            for indirect_call in calls_map.get(direct_call, []):
-                if indirect_call == search_for_function:
-                    return True
-                if indirect_call in visited:
-                    # This has already been handled
-                    continue
-                visited.add(indirect_call)
-                if find_recursive_call(search_for_function, indirect_call, calls_map, visited):
-                    return True
-            return False
-
         # List functions called in each function
         function_calls = {}
-        for scope in data.scopes:
-            if scope.type != 'Function':
-                continue
+        # Tokens that refer to a function, in the bodies of each function
+        function_tokens = {}
+        tokenlist = data.tokenlist
+        positions = self.getTokenPositions(data)
+        for scope in self.getScopesByType(data).get('Function', ()):
+            # The list keeps the order in which the calls are reported,
+            # the set makes the duplicate test cheap
             calls = []
-            tok = scope.bodyStart
-            while tok != scope.bodyEnd:
-                tok = tok.next
-                if not isFunctionCall(tok):
+            seen = set()
+            tokens = function_tokens.setdefault(scope.function, [])
+            # The body is a contiguous part of the token list
+            for tok in tokenlist[positions[scope.bodyStart] + 1:positions[scope.bodyEnd] + 1]:
+                if tok.function:
+                    tokens.append(tok)
+                # Test the string first so that most tokens don't pay for the call
+                if tok.str != '(' or not isFunctionCall(tok):
                     continue
                 f = tok.astOperand1.function
-                if f is not None and f not in calls:
+                if f is not None and f not in seen:
+                    seen.add(f)
                     calls.append(f)
             function_calls[scope.function] = calls
 
+        # find recursions..
+        components = findCallCycles(function_calls)
+
         # Report warnings for all recursions..
         for func in function_calls:
             for call in function_calls[func]:
-                if not find_recursive_call(func, call, function_calls):
+                if components[func] != components[call]:
                     # Function call is not recursive
                     continue
                 # Warn about all functions calls..
-                for scope in data.scopes:
-                    if scope.type != 'Function' or scope.function != func:
-                        continue
-                    tok = scope.bodyStart
-                    while tok != scope.bodyEnd:
-                        if tok.function and tok.function == call:
-                            self.reportError(tok, 17, 2)
-                        tok = tok.next
+                for tok in function_tokens[func]:
+                    if tok.function == call:
+                        self.reportError(tok, 17, 2)
 
     def misra_17_6(self, rawTokens):
         for token in rawTokens:
-            if simpleMatch(token, '[ static'):
+            if token.str == '[' and token.next and token.next.str == 'static':
                 self.reportError(token, 17, 6)
 
     def misra_17_7(self, data):
@@ -1750,9 +2115,7 @@ class MisraChecker:
                 self.reportError(token, 17, 8)
 
     def misra_18_4(self, data):
-        for token in data.tokenlist:
-            if token.str not in ('+', '-', '+=', '-='):
-                continue
+        for token in self.getTokens(data, ('+', '-', '+=', '-=')):
             if token.astOperand1 is None or token.astOperand2 is None:
                 continue
             vt1 = token.astOperand1.valueType
@@ -1768,7 +2131,8 @@ class MisraChecker:
                 continue
             typetok = var.nameToken
             count = 0
-            while typetok:
+            # Stop at the third star, more don't change the result
+            while typetok and count <= 2:
                 if typetok.str == '*':
                     count = count + 1
                 elif not typetok.isName:
@@ -1778,9 +2142,7 @@ class MisraChecker:
                 self.reportError(var.nameToken, 18, 5)
 
     def misra_18_7(self, data):
-        for scope in data.scopes:
-            if scope.type != 'Struct':
-                continue
+        for scope in self.getScopesByType(data).get('Struct', ()):
 
             token = scope.bodyStart.next
             while token != scope.bodyEnd and token is not None:
@@ -1808,24 +2170,22 @@ class MisraChecker:
                 self.reportError(var.nameToken, 18, 8)
 
     def misra_19_2(self, data):
-        for token in data.tokenlist:
-            if token.str == 'union':
-                self.reportError(token, 19, 2)
+        for token in data.tokensByStr('union'):
+            self.reportError(token, 19, 2)
 
     def misra_20_1(self, data):
         token_in_file={}
         for token in data.tokenlist:
-            if token.file not in token_in_file:
-                token_in_file[token.file] = int(token.linenr)
-            else:
-                token_in_file[token.file] = min(token_in_file[token.file], int(token.linenr))
+            linenr = token_in_file.get(token.file)
+            if linenr is None or token.linenr < linenr:
+                token_in_file[token.file] = token.linenr
 
         for directive in data.directives:
             if not directive.str.startswith('#include'):
                 continue
             if directive.file not in token_in_file:
                 continue
-            if token_in_file[directive.file] < int(directive.linenr):
+            if token_in_file[directive.file] < directive.linenr:
                 self.reportError(directive, 20, 1)
 
     def misra_20_2(self, data):
@@ -1840,15 +2200,20 @@ class MisraChecker:
     def misra_20_3(self, rawTokens):
         linenr = -1
         for token in rawTokens:
-            if token.str.startswith('/') or token.linenr == linenr:
+            # Only the first token of a line that isn't a comment can start
+            # a directive
+            if token.linenr == linenr or token.str.startswith('/'):
                 continue
             linenr = token.linenr
-            if not simpleMatch(token, '# include'):
+            if token.str != '#':
+                continue
+            directiveToken = token.next
+            if not directiveToken or directiveToken.str != 'include':
                 continue
-            headerToken = token.next.next
+            headerToken = directiveToken.next
             num = 0
             while headerToken and headerToken.linenr == linenr:
-                if not headerToken.str.startswith('/*') and not headerToken.str.startswith('//'):
+                if not headerToken.str.startswith(COMMENT_PREFIXES):
                     num += 1
                 headerToken = headerToken.next
             if num != 1:
@@ -1856,7 +2221,7 @@ class MisraChecker:
 
     def misra_20_4(self, data):
         for directive in data.directives:
-            res = re.search(r'#define ([a-z][a-z0-9_]+)', directive.str)
+            res = DEFINE_LOWERCASE_NAME.search(directive.str)
             if res and (res.group(1) in KEYWORDS):
                 self.reportError(directive, 20, 4)
 
@@ -1866,8 +2231,7 @@ class MisraChecker:
                 self.reportError(directive, 20, 5)
 
     def misra_20_7(self, data):
-        for directive in data.directives:
-            d = Define(directive)
+        for directive, d in self.getFunctionMacros(data):
             exp = '(' + d.expansionList + ')'
             for arg in d.args:
                 pos = 0
@@ -1878,9 +2242,9 @@ class MisraChecker:
                     pos1 = pos - 1
                     pos2 = pos + len(arg)
                     pos = pos2
-                    if isalnum(exp[pos1]) or exp[pos1] == '_':
+                    if exp[pos1] in IDENTIFIER_CHARS:
                         continue
-                    if isalnum(exp[pos2]) or exp[pos2] == '_':
+                    if exp[pos2] in IDENTIFIER_CHARS:
                         continue
                     while exp[pos1] == ' ':
                         pos1 -= 1
@@ -1894,20 +2258,17 @@ class MisraChecker:
                         break
 
     def misra_20_10(self, data):
-        for directive in data.directives:
-            d = Define(directive)
+        for directive, d in self.getFunctionMacros(data):
             if d.expansionList.find('#') >= 0:
                 self.reportError(directive, 20, 10)
 
     def misra_20_13(self, data):
-        dir_pattern = re.compile(r'#[ ]*([^ (<]*)')
         for directive in data.directives:
             dir = directive.str
-            mo = dir_pattern.match(dir)
+            mo = DIRECTIVE_NAME.match(dir)
             if mo:
                 dir = mo.group(1)
-            if dir not in ['define', 'elif', 'else', 'endif', 'error', 'if', 'ifdef', 'ifndef', 'include',
-                        'pragma', 'undef', 'warning']:
+            if dir not in PREPROCESSOR_DIRECTIVES:
                 self.reportError(directive, 20, 13)
 
     def misra_20_14(self, data):
@@ -1915,15 +2276,18 @@ class MisraChecker:
         # the size increases when there are inner #if directives.
         ifStack = []
         for directive in data.directives:
-            if directive.str.startswith('#if ') or directive.str.startswith('#ifdef ') or directive.str.startswith('#ifndef '):
+            # Split off the directive name once. hasArgs tells '#if x' from
+            # a bare '#else' or '#endif'.
+            name, hasArgs, _ = directive.str.partition(' ')
+            if hasArgs and name in IF_DIRECTIVES:
                 ifStack.append(directive)
-            elif directive.str == '#else' or directive.str.startswith('#elif '):
+            elif (name == '#else' and not hasArgs) or (name == '#elif' and hasArgs):
                 if len(ifStack) == 0:
                     self.reportError(directive, 20, 14)
                     ifStack.append(directive)
                 elif directive.file != ifStack[-1].file:
                     self.reportError(directive, 20, 14)
-            elif directive.str == '#endif':
+            elif name == '#endif' and not hasArgs:
                 if len(ifStack) == 0:
                     self.reportError(directive, 20, 14)
                 elif directive.file != ifStack[-1].file:
@@ -1932,16 +2296,21 @@ class MisraChecker:
 
     def misra_21_1(self, data):
         # Reference: n1570 7.1.3 - Reserved identifiers
-        re_forbidden_macro = re.compile(r'#define (errno|_[_A-Z]+)')
-
         # Search for forbidden identifiers in macro names
         for directive in data.directives:
-            res = re.search(re_forbidden_macro, directive.str)
+            res = DEFINE_RESERVED_NAME.search(directive.str)
             if res:
                 self.reportError(directive, 21, 1)
 
-        type_name_tokens = (t for t in data.tokenlist if t.typeScopeId)
-        type_fields_tokens = (t for t in data.tokenlist if t.valueType and t.valueType.typeScopeId)
+        # Collect both token groups in one pass. They are kept apart so
+        # that the report order doesn't change.
+        type_name_tokens = []
+        type_fields_tokens = []
+        for t in data.tokenlist:
+            if t.typeScopeId:
+                type_name_tokens.append(t)
+            if t.valueType and t.valueType.typeScopeId:
+                type_fields_tokens.append(t)
 
         # Search for forbidden identifiers
         for i in itertools.chain(data.variables, data.functions, type_name_tokens, type_fields_tokens):
@@ -1952,12 +2321,13 @@ class MisraChecker:
                 token = i.tokenDef
             if not token:
                 continue
-            if len(token.str) < 2:
+            name = token.str
+            if len(name) < 2:
                 continue
-            if token.str == 'errno':
+            if name == 'errno':
                 self.reportError(token, 21, 1)
-            if token.str[0] == '_':
-                if (token.str[1] in string.ascii_uppercase) or (token.str[1] == '_'):
+            if name[0] == '_':
+                if name[1] in RESERVED_IDENTIFIER_SECOND_CHARS:
                     self.reportError(token, 21, 1)
 
                 # Allow identifiers with file scope visibility (static)
@@ -1970,8 +2340,8 @@ class MisraChecker:
                 self.reportError(token, 21, 1)
 
     def misra_21_3(self, data):
-        for token in data.tokenlist:
-            if isFunctionCall(token) and (token.astOperand1.str in ('malloc', 'calloc', 'realloc', 'free')):
+        for token in self.getFunctionCalls(data):
+            if token.astOperand1.str in DYNAMIC_MEMORY_FUNCTIONS:
                 self.reportError(token, 21, 3)
 
     def misra_21_4(self, data):
@@ -1993,18 +2363,18 @@ class MisraChecker:
             self.reportError(dir_wchar, 21, 6)
 
     def misra_21_7(self, data):
-        for token in data.tokenlist:
-            if isFunctionCall(token) and (token.astOperand1.str in ('atof', 'atoi', 'atol', 'atoll')):
+        for token in self.getFunctionCalls(data):
+            if token.astOperand1.str in STRING_CONVERSION_FUNCTIONS:
                 self.reportError(token, 21, 7)
 
     def misra_21_8(self, data):
-        for token in data.tokenlist:
-            if isFunctionCall(token) and (token.astOperand1.str in ('abort', 'exit', 'getenv', 'system')):
+        for token in self.getFunctionCalls(data):
+            if token.astOperand1.str in ENVIRONMENT_FUNCTIONS:
                 self.reportError(token, 21, 8)
 
     def misra_21_9(self, data):
-        for token in data.tokenlist:
-            if (token.str in ('bsearch', 'qsort')) and token.next and token.next.str == '(':
+        for token in self.getTokens(data, ('bsearch', 'qsort')):
+            if token.next and token.next.str == '(':
                 self.reportError(token, 21, 9)
 
     def misra_21_10(self, data):
@@ -2012,8 +2382,8 @@ class MisraChecker:
         if directive:
             self.reportError(directive, 21, 10)
 
-        for token in data.tokenlist:
-            if (token.str == 'wcsftime') and token.next and token.next.str == '(':
+        for token in data.tokensByStr('wcsftime'):
+            if token.next and token.next.str == '(':
                 self.reportError(token, 21, 10)
 
     def misra_21_11(self, data):
@@ -2023,15 +2393,10 @@ class MisraChecker:
 
     def misra_21_12(self, data):
         if findInclude(data.directives, '<fenv.h>'):
-            for token in data.tokenlist:
+            for token in self.getTokens(data, ('(', 'fexcept_t')):
                 if token.str == 'fexcept_t' and token.isName:
                     self.reportError(token, 21, 12)
-                if isFunctionCall(token) and (token.astOperand1.str in (
-                        'feclearexcept',
-                        'fegetexceptflag',
-                        'feraiseexcept',
-                        'fesetexceptflag',
-                        'fetestexcept')):
+                if isFunctionCall(token) and (token.astOperand1.str in FLOATING_POINT_EXCEPTION_FUNCTIONS):
                     self.reportError(token, 21, 12)
 
     def get_verify_expected(self):
@@ -2047,7 +2412,7 @@ class MisraChecker:
         if violation_type is None:
             return self.violations.items()
         else:
-            return self.violations[violation_type]
+            return self.violations.get(violation_type, [])
 
     def get_violation_types(self):
         """Return the list of violations for a normal checker run"""
@@ -2085,6 +2450,18 @@ class MisraChecker:
         else:
             line_symbol = None
 
+        # Nothing to do if the same suppression was added before
+        item = (ruleNum, normalized_filename, line_symbol)
+        if item in self.suppressionItems:
+            return
+        self.suppressionItems.add(item)
+
+        # Any suppression without a file name suppresses the rule globally
+        if normalized_filename is None or line_symbol is None:
+            self.suppressedLocations.add((ruleNum, normalized_filename, None))
+        elif lineNumber is not None:
+            self.suppressedLocations.add((ruleNum, normalized_filename, lineNumber))
+
         # If the rule is not in the dict already then add it
         if ruleNum not in self.suppressedRules:
             ruleItemList = list()
@@ -2114,28 +2491,9 @@ class MisraChecker:
             # Rule is added with a file scope. Done
             return
 
-        # Rule has a matching filename. Get the rule item list.
-
-        # Check the lists of rule items
-        # to see if this (lineNumber, symbolName) combination
-        # or None already exists.
-        ruleItemList = fileDict[normalized_filename]
-
-        if line_symbol is None:
-            # is it already in the list?
-            if line_symbol not in ruleItemList:
-                ruleItemList.append(line_symbol)
-        else:
-            # Check the list looking for matches
-            matched = False
-            for each in ruleItemList:
-                if each is not None:
-                    if (each[0] == line_symbol[0]) and (each[1] == line_symbol[1]):
-                        matched = True
-
-            # Append the rule item if it was not already found
-            if not matched:
-                ruleItemList.append(line_symbol)
+        # Rule has a matching filename. Add the rule item, duplicates have
+        # been skipped above.
+        fileDict[normalized_filename].append(line_symbol)
 
     def isRuleSuppressed(self, file_path, linenr, ruleNum):
         """
@@ -2145,65 +2503,52 @@ class MisraChecker:
         :param file_path: File path of checked location
         :param linenr: Line number of checked location
 
-        If the rule exists in the dict then check for a filename
-        If the filename is None then rule is suppressed globally
-        for all files.
-        If the filename exists then look for list of
-        line number, symbol name tuples.  If the list is None then
-        the rule is suppressed for the entire file
-        If the list of tuples exists then search the list looking for
-        matching line numbers.  Symbol names are currently ignored
+        The rule is suppressed if it is suppressed globally, for the
+        entire file or for the line. These are looked up in
+        suppressedLocations, which addSuppressedRule() keeps in sync
+        with suppressedRules. Symbol names are currently ignored
         because they can include regular expressions.
         TODO: Support symbol names and expression matching.
 
         """
-        ruleIsSuppressed = False
+        if ruleNum not in self.suppressedRules:
+            return False
+
+        # Suppressed globally
+        if (ruleNum, None, None) in self.suppressedLocations:
+            return True
 
         # Remove any prefix listed in command arguments from the filename.
+        # All locations of a file share the result.
         filename = None
         if file_path is not None:
-            if self.filePrefix is not None:
-                filename = remove_file_prefix(file_path, self.filePrefix)
-            else:
-                filename = os.path.basename(file_path)
-
-        if ruleNum in self.suppressedRules:
-            fileDict = self.suppressedRules[ruleNum]
+            filename = self.suppressionFileNames.get(file_path)
+            if filename is None:
+                if self.filePrefix is not None:
+                    filename = remove_file_prefix(file_path, self.filePrefix)
+                else:
+                    filename = os.path.basename(file_path)
+                self.suppressionFileNames[file_path] = filename
 
-            # a file name entry of None means that the rule is suppressed
-            # globally
-            if None in fileDict:
-                ruleIsSuppressed = True
-            else:
-                # Does the filename match one of the names in
-                # the file list
-                if filename in fileDict:
-                    # Get the list of ruleItems
-                    ruleItemList = fileDict[filename]
-
-                    if None in ruleItemList:
-                        # Entry of None in the ruleItemList means the rule is
-                        # suppressed for all lines in the filename
-                        ruleIsSuppressed = True
-                    else:
-                        # Iterate though the the list of line numbers
-                        # and symbols looking for a match of the line
-                        # number.  Matching the symbol is a TODO:
-                        for each in ruleItemList:
-                            if each is not None:
-                                if each[0] == linenr:
-                                    ruleIsSuppressed = True
+        # Suppressed for the entire file or for this line
+        return ((ruleNum, filename, None) in self.suppressedLocations or
+                (ruleNum, filename, linenr) in self.suppressedLocations)
 
-        return ruleIsSuppressed
+    def isEverythingSuppressed(self):
+        """
+        Check to see if the rules of all checks are globally suppressed.
+        """
+        for rule_num in CHECKED_RULES:
+            if not self.isRuleGloballySuppressed(rule_num):
+                return False
+        return True
 
     def isRuleGloballySuppressed(self, rule_num):
         """
         Check to see if a rule is globally suppressed.
         :param rule_num: is the rule number in hundreds format
         """
-        if rule_num not in self.suppressedRules:
-            return False
-        return None in self.suppressedRules[rule_num]
+        return (rule_num, None, None) in self.suppressedLocations
 
     def parseSuppressions(self):
         """
@@ -2215,10 +2560,8 @@ class MisraChecker:
             misra_7_0
             misra.21.11
         """
-        rule_pattern = re.compile(r'^(misra|MISRA)[_.]([0-9]+)[_.]([0-9]+)')
-
         for each in self.dumpfileSuppressions:
-            res = rule_pattern.match(each.errorId)
+            res = SUPPRESSION_ERROR_ID.match(each.errorId)
 
             if res:
                 num1 = int(res.group(2)) * 100
@@ -2258,16 +2601,16 @@ class MisraChecker:
         suppression files
         """
         self.filePrefix = prefix
+        self.suppressionFileNames.clear()
 
     def setSuppressionList(self, suppressionlist):
         num1 = 0
         num2 = 0
-        rule_pattern = re.compile(r'([0-9]+).([0-9]+)')
         strlist = suppressionlist.split(",")
 
         # build ignore list
         for item in strlist:
-            res = rule_pattern.match(item)
+            res = SUPPRESSION_LIST_ITEM.match(item)
             if res:
                 num1 = int(res.group(1))
                 num2 = int(res.group(2))
@@ -2276,33 +2619,37 @@ class MisraChecker:
                 self.addSuppressedRule(ruleNum)
 
     def reportError(self, location, num1, num2):
+        if self.cachedReports is not None:
+            self.cachedReports.append([location.file, location.linenr, getattr(location, 'column', None), num1, num2])
+            if self.collectOnly:
+                return
+
         ruleNum = num1 * 100 + num2
 
         if self.settings.verify:
             self.verify_actual.append(str(location.linenr) + ':' + str(num1) + '.' + str(num2))
         elif self.isRuleSuppressed(location.file, location.linenr, ruleNum):
             # Error is suppressed. Ignore
-            self.suppressionStats.setdefault(ruleNum, 0)
-            self.suppressionStats[ruleNum] += 1
+            self.suppressionStats[ruleNum] = self.suppressionStats.get(ruleNum, 0) + 1
             return
         else:
-            errorId = 'c2012-' + str(num1) + '.' + str(num2)
-            misra_severity = 'Undefined'
-            cppcheck_severity = 'style'
-            if ruleNum in self.ruleTexts:
-                errmsg = self.ruleTexts[ruleNum].text
-                if self.ruleTexts[ruleNum].misra_severity:
-                    misra_severity = self.ruleTexts[ruleNum].misra_severity
-                cppcheck_severity = self.ruleTexts[ruleNum].cppcheck_severity
+            ids = self.errorIds.get(ruleNum)
+            if ids is None:
+                errorId = 'c2012-' + str(num1) + '.' + str(num2)
+                ids = self.errorIds[ruleNum] = (errorId, 'misra-' + errorId)
+            errorId, violationId = ids
+            info = self.ruleInfo.get(ruleNum)
+            if info is not None:
+                errmsg, misra_severity, cppcheck_severity = info
             elif len(self.ruleTexts) == 0:
                 errmsg = 'misra violation (use --rule-texts=<file> to get proper output)'
+                misra_severity = 'Undefined'
+                cppcheck_severity = 'style'
             else:
                 return
             cppcheckdata.reportError(location, cppcheck_severity, errmsg, 'misra', errorId, misra_severity)
 
-            if misra_severity not in self.violations:
-                self.violations[misra_severity] = []
-            self.violations[misra_severity].append('misra-' + errorId)
+            self.violations[misra_severity].append(violationId)
 
     def loadRuleTexts(self, filename):
         num1 = 0
@@ -2311,23 +2658,19 @@ class MisraChecker:
         ruleText = False
         expect_more = False
 
-        Rule_pattern = re.compile(r'^Rule ([0-9]+).([0-9]+)')
-        severity_pattern = re.compile(r'.*[ ]*(Advisory|Required|Mandatory)$')
-        xA_Z_pattern = re.compile(r'^[#A-Z].*')
-        a_z_pattern = re.compile(r'^[a-z].*')
-        # Try to detect the file encoding
-        file_stream = None
+        # Try to detect the file encoding. The file is read once and the
+        # bytes are decoded with each encoding until one succeeds.
+        with open(filename, 'rb') as f:
+            content = f.read()
+        lines = None
         encodings = ['ascii', 'utf-8', 'windows-1250', 'windows-1252']
         for e in encodings:
             try:
-                file_stream = codecs.open(filename, 'r', encoding=e)
-                file_stream.readlines()
-                file_stream.seek(0)
+                lines = content.decode(e).splitlines()
             except UnicodeDecodeError:
-                file_stream = None
-            else:
-                break
-        if not file_stream:
+                continue
+            break
+        if lines is None:
             print('Could not find a suitable codec for "' + filename + '".')
             print('If you know the codec please report it to the developers so the list can be enhanced.')
             print('Trying with default codec now and ignoring errors if possible ...')
@@ -2336,12 +2679,14 @@ class MisraChecker:
             except TypeError:
                 # Python 2 does not support the errors parameter
                 file_stream = open(filename, 'rt')
+            with file_stream:
+                lines = file_stream.readlines()
 
         rule = None
         have_severity = False
         severity_loc  = 0
 
-        for line in file_stream:
+        for line in lines:
 
             line = line.replace('\r', '').replace('\n', '')
 
@@ -2355,7 +2700,7 @@ class MisraChecker:
                 continue
 
             # Parse rule declaration.
-            res = Rule_pattern.match(line)
+            res = RULE_TEXT_RULE.match(line)
 
             if res:
                 have_severity = False
@@ -2366,10 +2711,10 @@ class MisraChecker:
                 rule = Rule(num1, num2)
 
             if not have_severity and rule is not None:
-                res = severity_pattern.match(line)
+                res = RULE_TEXT_SEVERITY.match(line)
 
                 if res:
-                    rule.misra_severity = res.group(1)
+                    rule.setMisraSeverity(res.group(1))
                     have_severity = True
                 else:
                     severity_loc += 1
@@ -2390,7 +2735,7 @@ class MisraChecker:
 
             # Parse continuing of rule text.
             if expect_more:
-                if a_z_pattern.match(line):
+                if RULE_TEXT_LOWERCASE_LINE.match(line):
                     self.ruleTexts[rule.num].text += ' ' + line
                     continue
 
@@ -2398,11 +2743,16 @@ class MisraChecker:
                 continue
 
             # Parse beginning of rule text.
-            if xA_Z_pattern.match(line):
+            if RULE_TEXT_UPPERCASE_LINE.match(line):
                 rule.text = line
                 self.ruleTexts[rule.num] = rule
                 expect_more = True
 
+        self.ruleInfo = dict((num, (rule.text, rule.misra_severity or 'Undefined', rule.cppcheck_severity))
+                             for num, rule in self.ruleTexts.items())
+        self.violationSeverities = dict(('misra-c2012-%d.%d' % (num // 100, num % 100), rule.cppcheck_severity)
+                                        for num, rule in self.ruleTexts.items())
+
     def verifyRuleTexts(self):
         """Prints rule numbers without rule text."""
         rule_texts_rules = []
@@ -2432,11 +2782,102 @@ class MisraChecker:
         if not self.isRuleGloballySuppressed(rule_num):
             check_function(arg)
 
+    def getCacheKey(self, dumpfile):
+        """Returns the result cache key for a dump file. Besides the dump
+        file it depends on the addon sources and on the settings that decide
+        which checks are run."""
+        globallySuppressed = [str(ruleNum) for ruleNum in sorted(self.suppressedRules)
+                              if self.isRuleGloballySuppressed(ruleNum)]
+        return cppcheckdata.getCacheKey(dumpfile, 'misra',
+                                        cppcheckdata.getCacheKey(__file__),
+                                        cppcheckdata.getCacheKey(cppcheckdata.__file__),
+                                        self.stdversion,
+                                        ','.join(globallySuppressed))
+
+    def collectResult(self, dumpfile):
+        """Check a dump file in a worker process without reporting anything.
+
+        :param dumpfile: Dump file to check
+        :return: The violations in the format of the result cache, the main
+                 process reports them with loadCachedResult()
+        """
+        self.collectOnly = True
+        # Status lines are printed by the main process
+        self.settings.quiet = True
+        return self.parseDump(dumpfile)
+
+    def parseDumps(self, dumpfiles, context):
+        """Check several dump files in parallel, one file per worker process.
+        The violations are reported in the order of the files, the output
+        is the same as when the files are checked one after another.
+
+        :param dumpfiles: Dump files to check
+        :param context: multiprocessing context that forks the workers
+        """
+        global workerChecker
+        workerChecker = self
+        pool = context.Pool(self.settings.jobs)
+        try:
+            for dumpfile, result in zip(dumpfiles, pool.imap(collectResult, dumpfiles)):
+                self.loadCachedResult(dumpfile, result)
+        finally:
+            pool.close()
+            pool.join()
+            workerChecker = None
+
+    def loadCachedResult(self, dumpfile, result):
+        """Report the violations of a dump file that were stored in the
+        result cache by parseDump() or collected by collectResult()."""
+        self.dumpfileSuppressions = [cppcheckdata.Suppression(suppression)
+                                     for suppression in result['suppressions']]
+        self.parseSuppressions()
+
+        self.printStatus('Checking ' + dumpfile + '...')
+
+        configurations = result['configurations']
+        for name, reports in configurations:
+            if len(configurations) > 1:
+                self.printStatus('Checking ' + dumpfile + ', config "' + name + '"...')
+            for file, linenr, column, num1, num2 in reports:
+                self.reportError(ReportLocation(file, linenr, column), num1, num2)
+
     def parseDump(self, dumpfile):
 
+        # Nothing is reported if every rule is suppressed globally, for
+        # example with --suppress-rules, so the dump file isn't parsed
+        if not self.settings.verify and self.isEverythingSuppressed():
+            result = {'suppressions': [], 'configurations': []}
+            if not self.collectOnly:
+                self.loadCachedResult(dumpfile, result)
+            return result
+
+        # The violations are cached before suppressions and rule texts are
+        # applied, so the cache works with any of these. In verify mode the
+        # expected violations are read from the dump file, it is not cached.
+        # The same result is returned to the main process by collectResult().
+        cacheKey = None
+        result = None
+        if self.settings.cache_dir and not self.settings.verify:
+            cacheKey = self.getCacheKey(dumpfile)
+            result = cppcheckdata.loadCache(self.settings.cache_dir, cacheKey)
+            if result is not None:
+                if not self.collectOnly:
+                    self.loadCachedResult(dumpfile, result)
+                return result
+        if cacheKey or self.collectOnly:
+            result = {'suppressions': [], 'configurations': []}
+
         data = cppcheckdata.parsedump(dumpfile)
 
+        if result is not None:
+            for suppression in data.suppressions:
+                result['suppressions'].append({'errorId': suppression.errorId,
+                                               'fileName': suppression.fileName,
+                                               'lineNumber': suppression.lineNumber,
+                                               'symbolName': suppression.symbolName})
+
         self.dumpfileSuppressions = data.suppressions
+        self.rawLinks = None
         self.parseSuppressions()
 
         typeBits['CHAR'] = data.platform.char_bit
@@ -2449,27 +2890,30 @@ class MisraChecker:
         if self.settings.verify:
             for tok in data.rawTokens:
                 if tok.str.startswith('//') and 'TODO' not in tok.str:
-                    compiled = re.compile(r'[0-9]+\.[0-9]+')
-                    for word in tok.str[2:].split(' '):
-                        if compiled.match(word):
-                            self.verify_expected.append(str(tok.linenr) + ':' + word)
+                    for word in VERIFY_RULE_WORD.findall(tok.str[2:]):
+                        self.verify_expected.append(str(tok.linenr) + ':' + word)
         else:
             self.printStatus('Checking ' + dumpfile + '...')
 
         cfgNumber = 0
 
-        for cfg in data.configurations:
-            cfg = data.Configuration(cfg)
+        for cfg in data.iterconfigurations():
+            clearEssentialTypeCaches()
             cfgNumber = cfgNumber + 1
             if len(data.configurations) > 1:
                 self.printStatus('Checking ' + dumpfile + ', config "' + cfg.name + '"...')
 
+            if result is not None:
+                self.cachedReports = []
+                result['configurations'].append([cfg.name, self.cachedReports])
+
             self.executeCheck(207, self.misra_2_7, cfg)
             if cfgNumber == 1:
-                self.executeCheck(301, self.misra_3_1, data.rawTokens)
-                self.executeCheck(302, self.misra_3_2, data.rawTokens)
-                self.executeCheck(401, self.misra_4_1, data.rawTokens)
-                self.executeCheck(402, self.misra_4_2, data.rawTokens)
+                comments, literals = splitRawTokens(data.rawTokens)
+                self.executeCheck(301, self.misra_3_1, comments)
+                self.executeCheck(302, self.misra_3_2, comments)
+                self.executeCheck(401, self.misra_4_1, literals)
+                self.executeCheck(402, self.misra_4_2, literals)
             self.executeCheck(501, self.misra_5_1, cfg)
             self.executeCheck(502, self.misra_5_2, cfg)
             self.executeCheck(503, self.misra_5_3, cfg)
@@ -2541,7 +2985,7 @@ class MisraChecker:
                 self.executeCheck(2003, self.misra_20_3, data.rawTokens)
             self.executeCheck(2004, self.misra_20_4, cfg)
             self.executeCheck(2005, self.misra_20_5, cfg)
-            self.executeCheck(2006, self.misra_20_7, cfg)
+            self.executeCheck(2007, self.misra_20_7, cfg)
             self.executeCheck(2010, self.misra_20_10, cfg)
             self.executeCheck(2013, self.misra_20_13, cfg)
             self.executeCheck(2014, self.misra_20_14, cfg)
@@ -2558,6 +3002,18 @@ class MisraChecker:
             self.executeCheck(2112, self.misra_21_12, cfg)
             # 22.4 is already covered by Cppcheck writeReadOnlyFile
 
+        self.cachedReports = None
+
+        if cacheKey:
+            cppcheckdata.storeCache(self.settings.cache_dir, cacheKey, result)
+        return result
+
+
+# Rule numbers in hundreds format of all checks of MisraChecker
+CHECKED_RULES = frozenset(int(res.group(1)) * 100 + int(res.group(2))
+                          for res in map(re.compile(r'misra_([0-9]+)_([0-9]+)$').match, dir(MisraChecker))
+                          if res)
+
 
 RULE_TEXTS_HELP = '''Path to text file of MISRA rules
 
@@ -2602,6 +3058,8 @@ def get_args():
     parser.add_argument("--no-summary", help="Hide summary of violations", action="store_true")
     parser.add_argument("--show-suppressed-rules", help="Print rule suppression list", action="store_true")
     parser.add_argument("-P", "--file-prefix", type=str, help="Prefix to strip when matching suppression file rules")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="Number of processes used to check the dump files in parallel")
+    parser.add_argument("--cache-dir", type=str, help="Directory where results are cached, they are reused as long as the dump file is unchanged")
     parser.add_argument("-generate-table", help=argparse.SUPPRESS, action="store_true")
     parser.add_argument("-verify", help=argparse.SUPPRESS, action="store_true")
     return parser.parse_args()
@@ -2643,28 +3101,40 @@ def main():
         sys.exit(0)
 
     exitCode = 0
-    for item in args.dumpfile:
-        checker.parseDump(item)
-
-        if settings.verify:
-            verify_expected = checker.get_verify_expected()
-            verify_actual   = checker.get_verify_actual()
-
-            for expected in verify_expected:
-                if expected not in verify_actual:
-                    print('Expected but not seen: ' + expected)
-                    exitCode = 1
-            for actual in verify_actual:
-                if actual not in verify_expected:
-                    print('Not expected: ' + actual)
-                    exitCode = 1
-
-            # Existing behavior of verify mode is to exit
-            # on the first un-expected output.
-            # TODO: Is this required? or can it be moved to after
-            # all input files have been processed
-            if exitCode != 0:
-                sys.exit(exitCode)
+    # The dump files are checked in parallel, one file per worker process
+    context = None
+    if settings.jobs > 1 and len(args.dumpfile) > 1 and not settings.verify:
+        context = getForkContext()
+    if context is not None:
+        checker.parseDumps(args.dumpfile, context)
+    else:
+        for item in args.dumpfile:
+            checker.parseDump(item)
+
+            if settings.verify:
+                verify_expected = checker.get_verify_expected()
+                verify_actual   = checker.get_verify_actual()
+
+                # The lists are walked in order so that the messages keep
+                # their order, the sets make the lookups cheap
+                expected_set = set(verify_expected)
+                actual_set   = set(verify_actual)
+
+                for expected in verify_expected:
+                    if expected not in actual_set:
+                        print('Expected but not seen: ' + expected)
+                        exitCode = 1
+                for actual in verify_actual:
+                    if actual not in expected_set:
+                        print('Not expected: ' + actual)
+                        exitCode = 1
+
+                # Existing behavior of verify mode is to exit
+                # on the first un-expected output.
+                # TODO: Is this required? or can it be moved to after
+                # all input files have been processed
+                if exitCode != 0:
+                    sys.exit(exitCode)
 
     # Under normal operation exit with a non-zero exit code
     # if there were any violations.
@@ -2674,25 +3144,19 @@ def main():
             exitCode = 1
 
             if settings.show_summary:
-                print("\nMISRA rules violations found:\n\t%s\n" % (
-                    "\n\t".join(["%s: %d" % (viol, len(checker.get_violations(viol))) for viol in checker.get_violation_types()])))
-
-                rules_violated = {}
+                # Count the violations per severity and per rule in one pass
+                severities_violated = []
+                rules_violated = collections.Counter()
                 for severity, ids in checker.get_violations():
-                    for misra_id in ids:
-                        rules_violated[misra_id] = rules_violated.get(misra_id, 0) + 1
+                    severities_violated.append("%s: %d" % (severity, len(ids)))
+                    rules_violated.update(ids)
+                print("\nMISRA rules violations found:\n\t%s\n" % "\n\t".join(severities_violated))
+
                 print("MISRA rules violated:")
                 convert = lambda text: int(text) if text.isdigit() else text
-                misra_sort = lambda key: [ convert(c) for c in re.split(r'[\.-]([0-9]*)', key) ]
+                misra_sort = lambda key: [ convert(c) for c in SUMMARY_ID_PARTS.split(key) ]
                 for misra_id in sorted(rules_violated.keys(), key=misra_sort):
-                    res = re.match(r'misra-c2012-([0-9]+)\\.([0-9]+)', misra_id)
-                    if res is None:
-                        num = 0
-                    else:
-                        num = int(res.group(1)) * 100 + int(res.group(2))
-                    severity = '-'
-                    if num in checker.ruleTexts:
-                        severity = checker.ruleTexts[num].cppcheck_severity
+                    severity = checker.violationSeverities.get(misra_id, '-')
                     print("\t%15s (%s): %d" % (misra_id, severity, rules_violated[misra_id]))
 
     if args.show_suppressed_rules:
@@ -110,8 +110,7 @@ def process(dumpfiles, configfile, debugprint=False):
                     for exp in conf["RE_NAMESPACE"]:
                         evalExpr(conf["RE_NAMESPACE"], exp, mockToken, msgType, errors)
 
-        for cfg in data.configurations:
-            cfg = data.Configuration(cfg)
+        for cfg in data.iterconfigurations():
             if len(data.configurations) > 1:
                 print('Checking ' + afile + ', config "' + cfg.name + '"...')
             if "RE_VARNAME" in conf and conf["RE_VARNAME"]:
@@ -108,6 +108,10 @@ const char *s41_8 = "\xAA\x\x41"; // 4.1
 const char *s41_9 = "unknown\gsequence";
 const char *s41_10 = "simple\nsequence";
 const char *s41_11 = "string";
+const char *s41_12 = "a\x41g"; // 4.1
+const char *s41_13 = "C:\\x86";
+const char *s41_14 = "\\0";
+const char *s41_15 = "ab\\1";
 int c41_3         = '\141t'; // 4.1
 int c41_4         = '\141\t';
 int c41_5         = '\0';
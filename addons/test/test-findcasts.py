@@ -0,0 +1,74 @@
+# Running the test with Python 2:
+# Be sure to install pytest version 4.6.4 (newer should also work)
+# Command in cppcheck directory:
+# python -m pytest addons/test/test-findcasts.py
+#
+# Running the test with Python 3:
+# Command in cppcheck directory:
+# PYTHONPATH=./addons python3 -m pytest addons/test/test-findcasts.py
+
+from addons.cppcheckdata import scandump
+from addons.findcasts import getCasts, prescanDumpFile
+
+from .util import dump_create, dump_remove
+
+
+TEST_SOURCE_FILES = ['./addons/test/cert-test.c',
+                     './addons/test/cert-test.cpp',
+                     './addons/test/misc-test.cpp',
+                     './addons/test/naming_test.c',
+                     './addons/test/naming_test.cpp',
+                     './addons/test/namingng_test.c',
+                     './addons/test/misra/misra-test.c',
+                     './addons/test/misra/misra-test.cpp',
+                     './addons/test/y2038/y2038-test-1-bad-time-bits.c',
+                     './addons/test/y2038/y2038-test-4-good.c']
+
+
+def setup_module(module):
+    for f in TEST_SOURCE_FILES:
+        dump_create(f)
+
+
+def teardown_module(module):
+    for f in TEST_SOURCE_FILES:
+        dump_remove(f)
+
+
+def scanDumpFile(dumpfile):
+    return [(name, getCasts(tokens)) for name, tokens in scandump(dumpfile)]
+
+
+def test_prescan_agrees_with_scan():
+    foundCasts = False
+    for f in TEST_SOURCE_FILES:
+        dumpfile = f + '.dump'
+        configurations = scanDumpFile(dumpfile)
+        hasCasts = any(casts for name, casts in configurations)
+        foundCasts = foundCasts or hasCasts
+        names = prescanDumpFile(dumpfile)
+        if names is not None:
+            # Files are only skipped if they contain no casts
+            assert not hasCasts, dumpfile
+            assert names == [name for name, casts in configurations], dumpfile
+    assert foundCasts
+
+
+def test_prescan_attribute_order(tmpdir):
+    # The prescan must not depend on the order of the token attributes
+    dumpfile = tmpdir.join('cast.c.dump')
+    dumpfile.write('<?xml version="1.0"?>\n'
+                   '<dumps>\n'
+                   '  <dump cfg="">\n'
+                   '    <tokenlist>\n'
+                   '      <token id="1" astOperand1="2" file="cast.c" linenr="1" column="1"'
+                   ' str="(" type="other"/>\n'
+                   '      <token id="2" file="cast.c" linenr="1" column="2" str="int"'
+                   ' type="name"/>\n'
+                   '      <token id="3" file="cast.c" linenr="1" column="5" str=")"'
+                   ' type="other"/>\n'
+                   '    </tokenlist>\n'
+                   '  </dump>\n'
+                   '</dumps>\n')
+    assert len(scanDumpFile(str(dumpfile))[0][1]) == 1
+    assert prescanDumpFile(str(dumpfile)) is None
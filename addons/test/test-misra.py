@@ -75,6 +75,12 @@ def test_rules_misra_severity(checker):
     assert(checker.ruleTexts[2104].misra_severity == '')
 
 
+def test_get_violations_unknown_type(checker):
+    # Asking for a type must not add it to the violations
+    assert(checker.get_violations('Required') == [])
+    assert(len(checker.get_violations()) == 0)
+
+
 def test_json_out(checker, capsys):
     sys.argv.append("--cli")
     checker.loadRuleTexts("./addons/test/misra/misra_rules_dummy.txt")
@@ -97,6 +103,37 @@ def test_rules_cppcheck_severity(checker, capsys):
     assert("(style)" in captured)
 
 
+def run_misra(*args):
+    cmd = [sys.executable, "./addons/misra.py"] + list(args) + ["./addons/test/misra/misra-test.c.dump"]
+    p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return p.communicate()
+
+
+def test_jobs_dumpfiles():
+    # Several dump files are checked in parallel, one per process
+    dumpfile = "./addons/test/misra/misra-test.c.dump"
+    assert(run_misra("--jobs=2", dumpfile) == run_misra(dumpfile))
+
+
+def test_cache_dir(tmpdir):
+    expected = run_misra()
+    cache_dir = "--cache-dir=" + str(tmpdir)
+    assert(run_misra(cache_dir) == expected)
+    assert(len(tmpdir.listdir()) == 1)
+    assert(run_misra(cache_dir) == expected)
+
+
+def test_suppress_rules_20_7():
+    # 20.7 is checked under its own rule number, not as part of 20.6
+    out, err = run_misra("--cli", "--suppress-rules=20.6")
+    json_output = convert_json_output(out.decode('utf-8').splitlines())
+    assert('c2012-20.6' not in json_output)
+    assert('c2012-20.7' in json_output)
+    out, err = run_misra("--cli", "--suppress-rules=20.7")
+    json_output = convert_json_output(out.decode('utf-8').splitlines())
+    assert('c2012-20.7' not in json_output)
+
+
 def test_rules_suppression(checker, capsys):
     test_sources = ["addons/test/misra/misra-suppressions1-test.c",
                     "addons/test/misra/misra-suppressions2-test.c"]
@@ -122,7 +159,9 @@ def test_arguments_regression():
                "--cli",
                "--no-summary",
                "--show-suppressed-rules",
-               "-P=src/", "--file-prefix=src/"]
+               "-P=src/", "--file-prefix=src/",
+               "-j=2", "--jobs=2",
+               "--cache-dir=cache/"]
     # Arguments with expected SystemExit
     args_exit = ["--non-exists", "--non-exists-param=42", "-h", "--help"]
 
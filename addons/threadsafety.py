@@ -14,25 +14,33 @@ def reportError(token, severity, msg, id):
 
 def checkstatic(data):
     for var in data.variables:
-        if var.isStatic and var.isLocal:
-            type = None
-            if var.isClass:
-                type = 'object'
-            else:
-                type = 'variable'
-            if var.isConst:
-                reportError(var.typeStartToken, 'warning', 'Local constant static ' + type + ' \'' + var.nameToken.str + '\', dangerous if it is initialized in parallel threads', 'threadsafety')
-            else:
-                reportError(var.typeStartToken, 'warning', 'Local static ' + type + ': ' + var.nameToken.str, 'threadsafety')
-
-
-for arg in sys.argv[1:]:
-    if arg.startswith('-'):
-        continue
-    print('Checking ' + arg + '...')
-    data = cppcheckdata.parsedump(arg)
-    for cfg in data.configurations:
-        cfg = data.Configuration(cfg)
-        if len(data.configurations) > 1:
-            print('Checking ' + arg + ', config "' + cfg.name + '"...')
-        checkstatic(cfg)
+        # Most variables are rejected here
+        if not (var.isStatic and var.isLocal):
+            continue
+        type = 'object' if var.isClass else 'variable'
+        if var.isConst:
+            msg = 'Local constant static %s \'%s\', dangerous if it is initialized in parallel threads' % (type, var.nameToken.str)
+        else:
+            msg = 'Local static %s: %s' % (type, var.nameToken.str)
+        reportError(var.typeStartToken, 'warning', msg, 'threadsafety')
+
+
+def main():
+    for arg in sys.argv[1:]:
+        if arg.startswith('-'):
+            continue
+        print('Checking ' + arg + '...')
+        data = cppcheckdata.parsedump(arg)
+        for cfg in data.iterconfigurations():
+            if len(data.configurations) > 1:
+                print('Checking ' + arg + ', config "' + cfg.name + '"...')
+            # The findings of a configuration are written at once
+            cppcheckdata.beginBatch()
+            try:
+                checkstatic(cfg)
+            finally:
+                cppcheckdata.flushBatch()
+
+
+if __name__ == '__main__':
+    main()
@@ -165,8 +165,7 @@ def check_y2038_safe(dumpfile, quiet=False):
     srcfile = os.path.normpath(srcfile)
 
     # go through each configuration
-    for cfg in data.configurations:
-        cfg = data.Configuration(cfg)
+    for cfg in data.iterconfigurations():
         if not quiet:
             print('Checking ' + srcfile + ', config "' + cfg.name + '"...')
         safe_ranges = []
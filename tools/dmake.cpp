@@ -433,6 +433,7 @@ int main(int argc, char **argv)
     fout << "\tinstall -d ${DESTDIR}${FILESDIR}\n";
     fout << "\tinstall -d ${DESTDIR}${FILESDIR}/addons\n";
     fout << "\tinstall -m 644 addons/*.py ${DESTDIR}${FILESDIR}/addons\n";
+    fout << "\t-python3 -m compileall -q -d ${FILESDIR}/addons ${DESTDIR}${FILESDIR}/addons\n";
     fout << "\tinstall -d ${DESTDIR}${FILESDIR}/cfg\n";
     fout << "\tinstall -m 644 cfg/*.cfg ${DESTDIR}${FILESDIR}/cfg\n";
     fout << "\tinstall -d ${DESTDIR}${FILESDIR}/platforms\n";